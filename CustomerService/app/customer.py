@@ -1,9 +1,14 @@
-from sqlmodel import Session, select
-from typing import List
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Optional
 from datetime import date
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from core.models import Customer
-from core.database import get_session
+from core.schemas import CustomerWithRelations
+from core.database import get_async_session
+from core.fieldsets import Fieldset, sparse_fieldset
+from core.includes import dump_with_includes, eager_load_options, include_dependency
+from core.pagination import KeysetPage, fetch_page
 
 
 # Initialize FastAPI router
@@ -12,10 +17,12 @@ router = APIRouter(prefix="/customers", tags=["Customer"])
 
 # 1. Create Customer
 @router.post("/", response_model=Customer, tags=["Customer"])
-async def create_customer(customer: Customer, session: Session = Depends(get_session)):
+async def create_customer(
+    customer: Customer, session: AsyncSession = Depends(get_async_session)
+):
     session.add(customer)
-    session.commit()
-    session.refresh(customer)
+    await session.commit()
+    await session.refresh(customer)
     return customer
 
 
@@ -25,18 +32,64 @@ async def create_customer(customer: Customer, session: Session = Depends(get_ses
     response_model=Customer,
     tags=["Customer"],
 )
-async def get_customer(customer_number: int, session: Session = Depends(get_session)):
-    customer = session.get(Customer, customer_number)
+async def get_customer(
+    customer_number: int,
+    response: Response,
+    fieldset: Optional[Fieldset] = Depends(sparse_fieldset(Customer)),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if fieldset:
+        customer = await fieldset.fetch_one(
+            session, Customer.customer_number == customer_number
+        )
+    else:
+        customer = await session.get(Customer, customer_number)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
+    if fieldset:
+        return fieldset.render_one(customer, response)
     return customer
 
 
 # 3. Get all Customer
-@router.get("/", response_model=List[Customer], tags=["Customer"])
-async def get_all_customers(session: Session = Depends(get_session)):
-    customers = session.exec(select(Customer)).all()
-    return customers
+@router.get(
+    "/",
+    response_model=List[CustomerWithRelations],
+    response_model_exclude_unset=True,
+    tags=["Customer"],
+)
+async def get_all_customers(
+    response: Response,
+    page: KeysetPage = Depends(),
+    includes: List[str] = Depends(
+        include_dependency(
+            {
+                "orders": "orders",
+                "payments": "payments",
+                "sales_rep": "sales_rep_employee",
+            }
+        )
+    ),
+    fieldset: Optional[Fieldset] = Depends(sparse_fieldset(Customer)),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if fieldset:
+        if includes:
+            raise HTTPException(
+                status_code=400, detail="fields cannot be combined with include"
+            )
+        customers = await fetch_page(
+            session, fieldset.select(), Customer, page, response
+        )
+        return fieldset.render(customers, response)
+    customers = await fetch_page(
+        session,
+        select(Customer).options(*eager_load_options(Customer, includes)),
+        Customer,
+        page,
+        response,
+    )
+    return [dump_with_includes(customer, includes) for customer in customers]
 
 
 # 4. Update Customer
@@ -44,29 +97,28 @@ async def get_all_customers(session: Session = Depends(get_session)):
 async def update_customer(
     customer_number: int,
     updated_customer: Customer,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    customer = session.get(Customer, customer_number)
+    customer = await session.get(Customer, customer_number)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
     updated_data = updated_customer.model_dump(exclude_unset=True)
     for key, value in updated_data.items():
         setattr(customer, key, value)
     session.add(customer)
-    session.commit()
-    session.refresh(customer)
+    await session.commit()
+    await session.refresh(customer)
     return customer
 
 
 # 5. Delete Customer
 @router.delete("/{customer_number}", tags=["Customer"])
 async def delete_customer(
-    customer_number: int, session: Session = Depends(get_session)
+    customer_number: int, session: AsyncSession = Depends(get_async_session)
 ):
-    customer = session.get(Customer, customer_number)
+    customer = await session.get(Customer, customer_number)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
-    session.delete(customer)
-    session.commit()
-    session.refresh(customer)
+    await session.delete(customer)
+    await session.commit()
     return customer
@@ -2,11 +2,18 @@ from fastapi import FastAPI
 from .routers import employee_router, offices_router
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
+from core.lifespan import include_auth_routes, service_lifespan
+from core.pagination import NEXT_CURSOR_HEADER
+from core.rate_limit_middleware import RateLimitMiddleware
+from core.rate_limiting import RATE_LIMIT_HEADERS
 
-app = FastAPI()
+app = FastAPI(lifespan=service_lifespan)
 
 app.include_router(employee_router)
 app.include_router(offices_router)
+include_auth_routes(app)
+# Reject over-limit requests before routing (CORS stays outermost)
+app.add_middleware(RateLimitMiddleware)
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -14,6 +21,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, *RATE_LIMIT_HEADERS],
 )
 
 
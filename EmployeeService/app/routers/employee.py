@@ -1,9 +1,11 @@
-from typing import List, Generator
-from sqlmodel import create_engine, Session, select
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Response
 from core.models import Employee
-from core.config import DATABASE_URL
-from core.database import get_session
+from core.database import get_async_session
+from core.fieldsets import Fieldset, sparse_fieldset
+from core.pagination import KeysetPage, fetch_page
 
 
 # Initialize FastAPI router
@@ -12,26 +14,50 @@ router = APIRouter(prefix="/employees", tags=["Employee"])
 
 # 1. Create Employee
 @router.post("/", response_model=Employee)
-async def create_employee(employee: Employee, session: Session = Depends(get_session)):
+async def create_employee(
+    employee: Employee, session: AsyncSession = Depends(get_async_session)
+):
     session.add(employee)
-    session.commit()
-    session.refresh(employee)
+    await session.commit()
+    await session.refresh(employee)
     return employee
 
 
 # 2. Get Employee by Number
 @router.get("/{employee_number}", response_model=Employee)
-async def get_employee(employee_number: int, session: Session = Depends(get_session)):
-    employee = session.get(Employee, employee_number)
+async def get_employee(
+    employee_number: int,
+    response: Response,
+    fieldset: Optional[Fieldset] = Depends(sparse_fieldset(Employee)),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if fieldset:
+        employee = await fieldset.fetch_one(
+            session, Employee.employee_number == employee_number
+        )
+    else:
+        employee = await session.get(Employee, employee_number)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
+    if fieldset:
+        return fieldset.render_one(employee, response)
     return employee
 
 
 # 3. Get all Employees
 @router.get("/", response_model=List[Employee])
-async def get_all_employees(session: Session = Depends(get_session)):
-    employees = session.exec(select(Employee)).all()
+async def get_all_employees(
+    response: Response,
+    page: KeysetPage = Depends(),
+    fieldset: Optional[Fieldset] = Depends(sparse_fieldset(Employee)),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if fieldset:
+        employees = await fetch_page(
+            session, fieldset.select(), Employee, page, response
+        )
+        return fieldset.render(employees, response)
+    employees = await fetch_page(session, select(Employee), Employee, page, response)
     return employees
 
 
@@ -40,28 +66,28 @@ async def get_all_employees(session: Session = Depends(get_session)):
 async def update_employee(
     employee_number: int,
     updated_employee: Employee,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    employee = session.get(Employee, employee_number)
+    employee = await session.get(Employee, employee_number)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     updated_data = updated_employee.model_dump(exclude_unset=True)
     for key, value in updated_data.items():
         setattr(employee, key, value)
     session.add(employee)
-    session.commit()
-    session.refresh(employee)
+    await session.commit()
+    await session.refresh(employee)
     return employee
 
 
 # 5. Delete Employee
 @router.delete("/{employee_number}")
 async def delete_employee(
-    employee_number: int, session: Session = Depends(get_session)
+    employee_number: int, session: AsyncSession = Depends(get_async_session)
 ):
-    employee = session.get(Employee, employee_number)
+    employee = await session.get(Employee, employee_number)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
-    session.delete(employee)
-    session.commit()
+    await session.delete(employee)
+    await session.commit()
     return {"detail": "Employee deleted successfully"}
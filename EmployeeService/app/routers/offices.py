@@ -1,61 +1,100 @@
-from typing import List, Generator
-from sqlmodel import Session, select
-from fastapi import FastAPI, Depends, HTTPException
+from typing import List, Optional
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Response
 from core.models import Office
-from core.database import get_session
+from core.database import get_async_session
+from core.fieldsets import Fieldset, sparse_fieldset
+from core.etag import conditional_get, table_versions
+from core.pagination import KeysetPage, fetch_page
 
 # Initialize FastAPI router
-router = FastAPI(prefix="/offices", tags=["Offices"])
+router = APIRouter(prefix="/offices", tags=["Offices"])
 
 
 # 1. Create Office
 @router.post("/", response_model=Office)
-async def create_office(office: Office, session: Session = Depends(get_session)):
+async def create_office(
+    office: Office, session: AsyncSession = Depends(get_async_session)
+):
     session.add(office)
-    session.commit()
-    session.refresh(office)
+    await session.commit()
+    await table_versions.bump("offices")
+    await session.refresh(office)
     return office
 
 
 # 2. Get Office by Code
-@router.get("/{office_code}", response_model=Office)
-async def get_office(office_code: str, session: Session = Depends(get_session)):
-    office = session.get(Office, office_code)
+@router.get(
+    "/{office_code}",
+    response_model=Office,
+    dependencies=[Depends(conditional_get("offices"))],
+)
+async def get_office(
+    office_code: str,
+    response: Response,
+    fieldset: Optional[Fieldset] = Depends(sparse_fieldset(Office)),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if fieldset:
+        office = await fieldset.fetch_one(session, Office.office_code == office_code)
+    else:
+        office = await session.get(Office, office_code)
     if not office:
         raise HTTPException(status_code=404, detail="Office not found")
+    if fieldset:
+        return fieldset.render_one(office, response)
     return office
 
 
 # 3. Get all Offices
-@router.get("/", response_model=List[Office])
-async def get_all_offices(session: Session = Depends(get_session)):
-    offices = session.exec(select(Office)).all()
+@router.get(
+    "/",
+    response_model=List[Office],
+    dependencies=[Depends(conditional_get("offices"))],
+)
+async def get_all_offices(
+    response: Response,
+    page: KeysetPage = Depends(),
+    fieldset: Optional[Fieldset] = Depends(sparse_fieldset(Office)),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if fieldset:
+        offices = await fetch_page(session, fieldset.select(), Office, page, response)
+        return fieldset.render(offices, response)
+    offices = await fetch_page(session, select(Office), Office, page, response)
     return offices
 
 
 # 4. Update Office
 @router.put("/{office_code}", response_model=Office)
 async def update_office(
-    office_code: str, updated_office: Office, session: Session = Depends(get_session)
+    office_code: str,
+    updated_office: Office,
+    session: AsyncSession = Depends(get_async_session),
 ):
-    office = session.get(Office, office_code)
+    office = await session.get(Office, office_code)
     if not office:
         raise HTTPException(status_code=404, detail="Office not found")
     updated_data = updated_office.model_dump(exclude_unset=True)
     for key, value in updated_data.items():
         setattr(office, key, value)
     session.add(office)
-    session.commit()
-    session.refresh(office)
+    await session.commit()
+    await table_versions.bump("offices")
+    await session.refresh(office)
     return office
 
 
 # 5. Delete Office
 @router.delete("/{office_code}")
-async def delete_office(office_code: str, session: Session = Depends(get_session)):
-    office = session.get(Office, office_code)
+async def delete_office(
+    office_code: str, session: AsyncSession = Depends(get_async_session)
+):
+    office = await session.get(Office, office_code)
     if not office:
         raise HTTPException(status_code=404, detail="Office not found")
-    session.delete(office)
-    session.commit()
+    await session.delete(office)
+    await session.commit()
+    await table_versions.bump("offices")
     return {"detail": "Office deleted successfully"}
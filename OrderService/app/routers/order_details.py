@@ -1,8 +1,15 @@
-from typing import List
-from sqlmodel import create_engine, Session, select
-from fastapi import Depends, HTTPException, APIRouter
+from typing import Any, List, Optional
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi import Depends, HTTPException, APIRouter, Response, Body, Query
 from core.models import OrderDetail
-from core.database import get_session
+from core.schemas import BulkResult
+from core.bulk import bulk_upsert
+from core.config import BULK_BATCH_SIZE, MAX_BULK_BATCH_SIZE
+from core.database import get_async_session
+from core.fieldsets import Fieldset, sparse_fieldset
+from core.pagination import KeysetPage, fetch_page
+from core.streaming import EXPORT_RESPONSES, export_media_type, stream_export
 
 
 # Initialize  router
@@ -13,36 +20,66 @@ router = APIRouter(prefix="/orderdetails", tags=["OrderDetails"])
 @router.post("/", response_model=OrderDetail)
 async def create_order_detail(
     order_detail: OrderDetail,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     session.add(order_detail)
-    session.commit()
-    session.refresh(order_detail)
+    await session.commit()
+    await session.refresh(order_detail)
     return order_detail
 
 
+# Bulk create or update Order Details
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_upsert_order_details(
+    order_details: List[Any] = Body(...),
+    batch_size: int = Query(BULK_BATCH_SIZE, ge=1, le=MAX_BULK_BATCH_SIZE),
+    session: AsyncSession = Depends(get_async_session),
+):
+    return await bulk_upsert(session, OrderDetail, order_details, batch_size)
+
+
 # 7. Get OrderDetail by Order Number and Product Code
 @router.get("/{order_number}/{product_code}", response_model=OrderDetail)
 async def get_order_detail(
     order_number: int,
     product_code: str,
-    session: Session = Depends(get_session),
+    response: Response,
+    fieldset: Optional[Fieldset] = Depends(sparse_fieldset(OrderDetail)),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    statement = select(OrderDetail).where(
-        OrderDetail.orderNumber == order_number, OrderDetail.productCode == product_code
+    statement = (fieldset.select() if fieldset else select(OrderDetail)).where(
+        OrderDetail.order_number == order_number,
+        OrderDetail.product_code == product_code,
     )
-    order_detail = session.exec(statement).first()
+    order_detail = (await session.exec(statement)).first()
     if not order_detail:
         raise HTTPException(status_code=404, detail="OrderDetail not found")
+    if fieldset:
+        return fieldset.render_one(order_detail, response)
     return order_detail
 
 
 # 8. Get all OrderDetails
-@router.get("/", response_model=List[OrderDetail])
+@router.get("/", response_model=List[OrderDetail], responses=EXPORT_RESPONSES)
 async def get_all_order_details(
-    session: Session = Depends(get_session),
+    response: Response,
+    page: KeysetPage = Depends(),
+    export: Optional[str] = Depends(export_media_type),
+    fieldset: Optional[Fieldset] = Depends(sparse_fieldset(OrderDetail)),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    order_details = session.exec(select(OrderDetail)).all()
+    if export:
+        return stream_export(
+            OrderDetail, export, fieldset.columns if fieldset else None
+        )
+    if fieldset:
+        order_details = await fetch_page(
+            session, fieldset.select(), OrderDetail, page, response
+        )
+        return fieldset.render(order_details, response)
+    order_details = await fetch_page(
+        session, select(OrderDetail), OrderDetail, page, response
+    )
     return order_details
 
 
@@ -52,20 +89,21 @@ async def update_order_detail(
     order_number: int,
     product_code: str,
     updated_order_detail: OrderDetail,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     statement = select(OrderDetail).where(
-        OrderDetail.orderNumber == order_number, OrderDetail.productCode == product_code
+        OrderDetail.order_number == order_number,
+        OrderDetail.product_code == product_code,
     )
-    order_detail = session.exec(statement).first()
+    order_detail = (await session.exec(statement)).first()
     if not order_detail:
         raise HTTPException(status_code=404, detail="OrderDetail not found")
     updated_data = updated_order_detail.model_dump(exclude_unset=True)
     for key, value in updated_data.items():
         setattr(order_detail, key, value)
     session.add(order_detail)
-    session.commit()
-    session.refresh(order_detail)
+    await session.commit()
+    await session.refresh(order_detail)
     return order_detail
 
 
@@ -74,14 +112,15 @@ async def update_order_detail(
 async def delete_order_detail(
     order_number: int,
     product_code: str,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     statement = select(OrderDetail).where(
-        OrderDetail.orderNumber == order_number, OrderDetail.productCode == product_code
+        OrderDetail.order_number == order_number,
+        OrderDetail.product_code == product_code,
     )
-    order_detail = session.exec(statement).first()
+    order_detail = (await session.exec(statement)).first()
     if not order_detail:
         raise HTTPException(status_code=404, detail="OrderDetail not found")
-    session.delete(order_detail)
-    session.commit()
+    await session.delete(order_detail)
+    await session.commit()
     return {"detail": "OrderDetail deleted successfully"}
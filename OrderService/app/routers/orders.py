@@ -1,45 +1,160 @@
-from typing import List
-from sqlmodel import create_engine, Session, select
-from fastapi import APIRouter, Depends, HTTPException, APIRouter
-from core.models import Order
-from core.database import get_session
+from typing import Any, List, Optional
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Response, Body, Query
+from core.models import Order, OrderDetail, Product
+from core.schemas import BulkResult, OrderFull, OrderLine, OrderWithRelations
+from core.bulk import bulk_upsert
+from core.config import BULK_BATCH_SIZE, MAX_BULK_BATCH_SIZE, MAX_PAGE_SIZE
+from core.database import get_async_session
+from core.fieldsets import Fieldset, sparse_fieldset
+from core.includes import dump_with_includes, eager_load_options, include_dependency
+from core.pagination import KeysetPage, fetch_page
+from core.streaming import EXPORT_RESPONSES, export_media_type, stream_export
 
 
 # Initialize router
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
 
+async def load_full_orders(
+    session: AsyncSession, order_numbers: List[int]
+) -> List[OrderFull]:
+    """
+    Load orders with their lines, product names and totals in one query.
+
+    Args:
+        session (AsyncSession): The database session.
+        order_numbers (List[int]): The orders to load.
+
+    Returns:
+        List[OrderFull]: The orders found, in ascending order number.
+    """
+    statement = (
+        select(Order, OrderDetail, Product.product_name)
+        .outerjoin(OrderDetail, OrderDetail.order_number == Order.order_number)
+        .outerjoin(Product, Product.product_code == OrderDetail.product_code)
+        .where(Order.order_number.in_(order_numbers))
+        .order_by(Order.order_number, OrderDetail.order_line_number)
+    )
+    orders = {}
+    for order, detail, product_name in (await session.exec(statement)).all():
+        full = orders.setdefault(
+            order.order_number, OrderFull(order=order, lines=[], total=0)
+        )
+        if detail is None:
+            continue
+        line_total = detail.quantity_ordered * detail.price_each
+        full.lines.append(
+            OrderLine(
+                product_code=detail.product_code,
+                product_name=product_name,
+                quantity_ordered=detail.quantity_ordered,
+                price_each=detail.price_each,
+                order_line_number=detail.order_line_number,
+                line_total=line_total,
+            )
+        )
+        full.total += line_total
+    return list(orders.values())
+
+
 # 1. Create Order
 @router.post("/", response_model=Order)
 async def create_order(
     order: Order,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     session.add(order)
-    session.commit()
-    session.refresh(order)
+    await session.commit()
+    await session.refresh(order)
     return order
 
 
+# Bulk create or update Orders
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_upsert_orders(
+    orders: List[Any] = Body(...),
+    batch_size: int = Query(BULK_BATCH_SIZE, ge=1, le=MAX_BULK_BATCH_SIZE),
+    session: AsyncSession = Depends(get_async_session),
+):
+    return await bulk_upsert(session, Order, orders, batch_size)
+
+
+# Get many Orders with lines and totals
+@router.get("/full", response_model=List[OrderFull])
+async def get_full_orders(
+    order_number: List[int] = Query(..., max_length=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_async_session),
+):
+    return await load_full_orders(session, order_number)
+
+
 # 2. Get Order by Number
 @router.get("/{order_number}", response_model=Order)
 async def get_order(
     order_number: int,
-    session: Session = Depends(get_session),
+    response: Response,
+    fieldset: Optional[Fieldset] = Depends(sparse_fieldset(Order)),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    order = session.get(Order, order_number)
+    if fieldset:
+        order = await fieldset.fetch_one(session, Order.order_number == order_number)
+    else:
+        order = await session.get(Order, order_number)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
+    if fieldset:
+        return fieldset.render_one(order, response)
     return order
 
 
+# Get Order with lines, product names and total
+@router.get("/{order_number}/full", response_model=OrderFull)
+async def get_full_order(
+    order_number: int,
+    session: AsyncSession = Depends(get_async_session),
+):
+    orders = await load_full_orders(session, [order_number])
+    if not orders:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return orders[0]
+
+
 # 3. Get all Orders
-@router.get("/", response_model=List[Order])
+@router.get(
+    "/",
+    response_model=List[OrderWithRelations],
+    response_model_exclude_unset=True,
+    responses=EXPORT_RESPONSES,
+)
 async def get_all_orders(
-    session: Session = Depends(get_session),
+    response: Response,
+    page: KeysetPage = Depends(),
+    export: Optional[str] = Depends(export_media_type),
+    includes: List[str] = Depends(
+        include_dependency({"customer": "customer", "order_details": "order_details"})
+    ),
+    fieldset: Optional[Fieldset] = Depends(sparse_fieldset(Order)),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    orders = session.exec(select(Order)).all()
-    return orders
+    if fieldset and includes:
+        raise HTTPException(
+            status_code=400, detail="fields cannot be combined with include"
+        )
+    if export:
+        return stream_export(Order, export, fieldset.columns if fieldset else None)
+    if fieldset:
+        orders = await fetch_page(session, fieldset.select(), Order, page, response)
+        return fieldset.render(orders, response)
+    orders = await fetch_page(
+        session,
+        select(Order).options(*eager_load_options(Order, includes)),
+        Order,
+        page,
+        response,
+    )
+    return [dump_with_includes(order, includes) for order in orders]
 
 
 # 4. Update Order
@@ -47,17 +162,17 @@ async def get_all_orders(
 async def update_order(
     order_number: int,
     updated_order: Order,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    order = session.get(Order, order_number)
+    order = await session.get(Order, order_number)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     updated_data = updated_order.model_dump(exclude_unset=True)
     for key, value in updated_data.items():
         setattr(order, key, value)
     session.add(order)
-    session.commit()
-    session.refresh(order)
+    await session.commit()
+    await session.refresh(order)
     return order
 
 
@@ -65,11 +180,11 @@ async def update_order(
 @router.delete("/{order_number}")
 async def delete_order(
     order_number: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    order = session.get(Order, order_number)
+    order = await session.get(Order, order_number)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    session.delete(order)
-    session.commit()
+    await session.delete(order)
+    await session.commit()
     return {"detail": "Order deleted successfully"}
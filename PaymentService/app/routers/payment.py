@@ -1,9 +1,15 @@
-from typing import List, Generator
-from sqlmodel import create_engine, Session, select
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Response, Body, Query
 from core.models import Payment
-from core import DATABASE_URL
-from core.database import get_session
+from core.schemas import BulkResult
+from core.bulk import bulk_upsert
+from core.config import BULK_BATCH_SIZE, MAX_BULK_BATCH_SIZE
+from core.database import get_async_session
+from core.fieldsets import Fieldset, sparse_fieldset
+from core.pagination import KeysetPage, fetch_page
+from core.streaming import EXPORT_RESPONSES, export_media_type, stream_export
 
 
 # Initialize FastAPI router
@@ -12,68 +18,102 @@ router = APIRouter(prefix="/payments", tags=["Payment"])
 
 # 1. Create Payment
 @router.post("/", response_model=Payment)
-async def create_payment(payment: Payment, session: Session = Depends(get_session)):
+async def create_payment(
+    payment: Payment, session: AsyncSession = Depends(get_async_session)
+):
     session.add(payment)
-    session.commit()
-    session.refresh(payment)
+    await session.commit()
+    await session.refresh(payment)
     return payment
 
 
+# Bulk create or update Payments
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_upsert_payments(
+    payments: List[Any] = Body(...),
+    batch_size: int = Query(BULK_BATCH_SIZE, ge=1, le=MAX_BULK_BATCH_SIZE),
+    session: AsyncSession = Depends(get_async_session),
+):
+    return await bulk_upsert(session, Payment, payments, batch_size)
+
+
 # 2. Get Payment by Customer Number and Check Number
 @router.get("/{customer_number}/{check_number}", response_model=Payment)
 async def get_payment(
-    customer_number: int, check_number: str, session: Session = Depends(get_session)
+    customer_number: int,
+    check_number: str,
+    response: Response,
+    fieldset: Optional[Fieldset] = Depends(sparse_fieldset(Payment)),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    statement = select(Payment).where(
-        Payment.customerNumber == customer_number, Payment.checkNumber == check_number
+    statement = (fieldset.select() if fieldset else select(Payment)).where(
+        Payment.customer_number == customer_number,
+        Payment.check_number == check_number,
     )
-    payment = session.exec(statement).first()
+    payment = (await session.exec(statement)).first()
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
+    if fieldset:
+        return fieldset.render_one(payment, response)
     return payment
 
 
 # 3. Get all Payments
-@router.get("/", response_model=List[Payment])
-async def get_all_payments(session: Session = Depends(get_session)):
-    payments = session.exec(select(Payment)).all()
+@router.get("/", response_model=List[Payment], responses=EXPORT_RESPONSES)
+async def get_all_payments(
+    response: Response,
+    page: KeysetPage = Depends(),
+    export: Optional[str] = Depends(export_media_type),
+    fieldset: Optional[Fieldset] = Depends(sparse_fieldset(Payment)),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if export:
+        return stream_export(Payment, export, fieldset.columns if fieldset else None)
+    if fieldset:
+        payments = await fetch_page(session, fieldset.select(), Payment, page, response)
+        return fieldset.render(payments, response)
+    payments = await fetch_page(session, select(Payment), Payment, page, response)
     return payments
 
 
 # 4. Update Payment
-@router.put("/customer_number}/{check_number}", response_model=Payment)
+@router.put("/{customer_number}/{check_number}", response_model=Payment)
 async def update_payment(
     customer_number: int,
     check_number: str,
     updated_payment: Payment,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     statement = select(Payment).where(
-        Payment.customerNumber == customer_number, Payment.checkNumber == check_number
+        Payment.customer_number == customer_number,
+        Payment.check_number == check_number,
     )
-    payment = session.exec(statement).first()
+    payment = (await session.exec(statement)).first()
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
     updated_data = updated_payment.model_dump(exclude_unset=True)
     for key, value in updated_data.items():
         setattr(payment, key, value)
     session.add(payment)
-    session.commit()
-    session.refresh(payment)
+    await session.commit()
+    await session.refresh(payment)
     return payment
 
 
 # 5. Delete Payment
 @router.delete("/{customer_number}/{check_number}")
 async def delete_payment(
-    customer_number: int, check_number: str, session: Session = Depends(get_session)
+    customer_number: int,
+    check_number: str,
+    session: AsyncSession = Depends(get_async_session),
 ):
     statement = select(Payment).where(
-        Payment.customerNumber == customer_number, Payment.checkNumber == check_number
+        Payment.customer_number == customer_number,
+        Payment.check_number == check_number,
     )
-    payment = session.exec(statement).first()
+    payment = (await session.exec(statement)).first()
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
-    session.delete(payment)
-    session.commit()
+    await session.delete(payment)
+    await session.commit()
     return {"detail": "Payment deleted successfully"}
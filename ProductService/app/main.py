@@ -2,11 +2,20 @@ from fastapi import FastAPI
 from routers import product_router, product_lines_router
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
+from core.cache import product_cache, product_line_cache
+from core.jwt_auth import claims_cache, jwks_cache
+from core.lifespan import include_auth_routes, service_lifespan
+from core.pagination import NEXT_CURSOR_HEADER
+from core.rate_limit_middleware import RateLimitMiddleware
+from core.rate_limiting import RATE_LIMIT_HEADERS
 
-app = FastAPI()
+app = FastAPI(lifespan=service_lifespan)
 
 app.include_router(product_router)
 app.include_router(product_lines_router)
+include_auth_routes(app)
+# Reject over-limit requests before routing (CORS stays outermost)
+app.add_middleware(RateLimitMiddleware)
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -14,6 +23,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, *RATE_LIMIT_HEADERS],
 )
 
 
@@ -21,3 +31,14 @@ app.add_middleware(
 @app.get("/", include_in_schema=False)
 async def root():
     return RedirectResponse(url="/docs")
+
+
+# Catalog cache hit/miss counters
+@app.get("/cache/stats", include_in_schema=False)
+async def cache_stats():
+    return {
+        "product": product_cache.stats(),
+        "product_line": product_line_cache.stats(),
+        "jwt_claims": claims_cache.stats(),
+        "jwks": jwks_cache.stats(),
+    }
@@ -1,8 +1,17 @@
-from typing import List, Generator
-from sqlmodel import Relationship, Session, select
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Response, Body, Query
 from core.models import ProductLine, Product
-from core.database import get_session
+from core.schemas import BulkResult, ProductWithLine
+from core.bulk import bulk_upsert
+from core.cache import product_cache
+from core.config import BULK_BATCH_SIZE, MAX_BULK_BATCH_SIZE
+from core.database import get_async_session
+from core.fieldsets import Fieldset, sparse_fieldset
+from core.etag import conditional_get, table_versions
+from core.includes import dump_with_includes, eager_load_options, include_dependency
+from core.pagination import KeysetPage, fetch_page
 
 # Initialize FastAPI router
 router = APIRouter(prefix="/products", tags=["Product"])
@@ -10,54 +19,124 @@ router = APIRouter(prefix="/products", tags=["Product"])
 
 # 6. Create Product
 @router.post("/", response_model=Product)
-async def create_product(product: Product, session: Session = Depends(get_session)):
+async def create_product(
+    product: Product, session: AsyncSession = Depends(get_async_session)
+):
     session.add(product)
-    session.commit()
-    session.refresh(product)
+    await session.commit()
+    await table_versions.bump("products")
+    await session.refresh(product)
     return product
 
 
+# Bulk create or update Products
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_upsert_products(
+    products: List[Any] = Body(...),
+    batch_size: int = Query(BULK_BATCH_SIZE, ge=1, le=MAX_BULK_BATCH_SIZE),
+    session: AsyncSession = Depends(get_async_session),
+):
+    result = await bulk_upsert(session, Product, products, batch_size)
+    await table_versions.bump("products")
+    await product_cache.invalidate(
+        *(
+            item["product_code"]
+            for item in products
+            if isinstance(item, dict) and "product_code" in item
+        )
+    )
+    return result
+
+
 # 7. Get Product by Code
-@router.get("/{product_code}", response_model=Product)
-async def get_product(product_code: str, session: Session = Depends(get_session)):
-    product = session.get(Product, product_code)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
+@router.get(
+    "/{product_code}",
+    response_model=Product,
+    dependencies=[Depends(conditional_get("products"))],
+)
+async def get_product(
+    product_code: str,
+    response: Response,
+    fieldset: Optional[Fieldset] = Depends(sparse_fieldset(Product)),
+    session: AsyncSession = Depends(get_async_session),
+):
+    data = await product_cache.get(product_code)
+    if data is None:
+        product = await session.get(Product, product_code)
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        data = product.model_dump()
+        await product_cache.set(product_code, data)
+    # Sparse fieldsets are projected from the cached product
+    if fieldset:
+        return fieldset.render_one(data, response)
+    return data
 
 
-# 8. Get all Products with ProductLine details
-@router.get("/", response_model=List[Product])
-async def get_all_products(session: Session = Depends(get_session)):
-    products = session.exec(
-        select(Product).options(Relationship("productLine_relation"))
-    ).all()
-    return products
+# 8. Get all Products, optionally with ProductLine details
+@router.get(
+    "/",
+    response_model=List[ProductWithLine],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(conditional_get("products", "productlines"))],
+)
+async def get_all_products(
+    response: Response,
+    page: KeysetPage = Depends(),
+    includes: List[str] = Depends(
+        include_dependency({"product_line": "product_lines"})
+    ),
+    fieldset: Optional[Fieldset] = Depends(sparse_fieldset(Product)),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if fieldset:
+        if includes:
+            raise HTTPException(
+                status_code=400, detail="fields cannot be combined with include"
+            )
+        products = await fetch_page(session, fieldset.select(), Product, page, response)
+        return fieldset.render(products, response)
+    products = await fetch_page(
+        session,
+        select(Product).options(*eager_load_options(Product, includes)),
+        Product,
+        page,
+        response,
+    )
+    return [dump_with_includes(product, includes) for product in products]
 
 
 # 9. Update Product
 @router.put("/{product_code}", response_model=Product)
 async def update_product(
-    product_code: str, updated_product: Product, session: Session = Depends(get_session)
+    product_code: str,
+    updated_product: Product,
+    session: AsyncSession = Depends(get_async_session),
 ):
-    product = session.get(Product, product_code)
+    product = await session.get(Product, product_code)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     updated_data = updated_product.model_dump(exclude_unset=True)
     for key, value in updated_data.items():
         setattr(product, key, value)
     session.add(product)
-    session.commit()
-    session.refresh(product)
+    await session.commit()
+    await table_versions.bump("products")
+    await session.refresh(product)
+    await product_cache.invalidate(product_code)
     return product
 
 
 # 10. Delete Product
 @router.delete("/{product_code}")
-async def delete_product(product_code: str, session: Session = Depends(get_session)):
-    product = session.get(Product, product_code)
+async def delete_product(
+    product_code: str, session: AsyncSession = Depends(get_async_session)
+):
+    product = await session.get(Product, product_code)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    session.delete(product)
-    session.commit()
+    await session.delete(product)
+    await session.commit()
+    await table_versions.bump("products")
+    await product_cache.invalidate(product_code)
     return {"detail": "Product deleted successfully"}
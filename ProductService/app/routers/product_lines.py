@@ -1,69 +1,204 @@
-from typing import List
-from sqlmodel import Session, select
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from core.models import ProductLine
-from core.database import get_session
+from core.schemas import ProductLineRead
+from core.cache import product_line_cache
+from core.config import IMAGE_CACHE_MAX_AGE_SECONDS
+from core.database import get_async_session
+from core.fieldsets import Fieldset, sparse_fieldset
+from core.etag import conditional_get, table_versions
+from core.includes import deferred_options
+from core.pagination import KeysetPage, fetch_page
+from core.streaming import iter_blob, parse_byte_range
 
 # Initialize FastAPI router
 router = APIRouter(prefix="/productlines", tags=["ProductLine"])
 
 
 # 1. Create ProductLine
-@router.post("/", response_model=ProductLine)
+@router.post("/", response_model=ProductLineRead)
 async def create_product_line(
-    product_line: ProductLine, session: Session = Depends(get_session)
+    product_line: ProductLine, session: AsyncSession = Depends(get_async_session)
 ):
     session.add(product_line)
-    session.commit()
-    session.refresh(product_line)
+    await session.commit()
+    await table_versions.bump("productlines")
+    await session.refresh(product_line)
+    await product_line_cache.invalidate(product_line.product_line)
     return product_line
 
 
 # 2. Get ProductLine by ID
-@router.get("/{product_line_id}", response_model=ProductLine)
+@router.get(
+    "/{product_line_id}",
+    response_model=ProductLineRead,
+    dependencies=[Depends(conditional_get("productlines"))],
+)
 async def get_product_line(
-    product_line_id: str, session: Session = Depends(get_session)
+    product_line_id: str,
+    response: Response,
+    fieldset: Optional[Fieldset] = Depends(
+        sparse_fieldset(ProductLine, exclude=("image",))
+    ),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    product_line = session.get(ProductLine, product_line_id)
+    if fieldset:
+        product_line = await fieldset.fetch_one(
+            session, ProductLine.product_line == product_line_id
+        )
+        if not product_line:
+            raise HTTPException(status_code=404, detail="ProductLine not found")
+        return fieldset.render_one(product_line, response)
+    cached = await product_line_cache.get(product_line_id)
+    if cached is not None:
+        return cached
+    product_line = await session.get(
+        ProductLine, product_line_id, options=deferred_options(ProductLine)
+    )
     if not product_line:
         raise HTTPException(status_code=404, detail="ProductLine not found")
-    return product_line
+    data = product_line.model_dump()
+    await product_line_cache.set(product_line_id, data)
+    return data
+
+
+def sniff_image_type(head: Optional[bytes]) -> str:
+    """
+    Guess the image media type from its first bytes.
+    """
+    head = head or b""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+# Stream ProductLine image, with Range support
+@router.get(
+    "/{product_line_id}/image",
+    response_class=StreamingResponse,
+    dependencies=[Depends(conditional_get("productlines"))],
+)
+async def get_product_line_image(
+    product_line_id: str,
+    response: Response,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    session: AsyncSession = Depends(get_async_session),
+):
+    image = ProductLine.image
+    selected = ProductLine.product_line == product_line_id
+    row = (
+        await session.exec(
+            select(func.length(image), func.substr(image, 1, 12)).where(selected)
+        )
+    ).first()
+    if row is None or row[0] is None:
+        raise HTTPException(status_code=404, detail="ProductLine image not found")
+    total, head = row
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": f"public, max-age={IMAGE_CACHE_MAX_AGE_SECONDS}",
+    }
+    if "ETag" in response.headers:
+        headers["ETag"] = response.headers["ETag"]
+
+    start, end, status_code = 0, total - 1, 200
+    byte_range = parse_byte_range(range_header)
+    if byte_range is not None:
+        start, last = byte_range
+        if start < 0:
+            # Suffix range: the last -start bytes
+            start = max(total + start, 0)
+        if start >= total:
+            raise HTTPException(
+                status_code=416,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{total}"},
+            )
+        end = total - 1 if last is None else min(last, total - 1)
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{total}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    # Only the requested bytes leave the database, one chunk at a time
+    return StreamingResponse(
+        iter_blob(session.bind, image, selected, start, end),
+        status_code=status_code,
+        media_type=sniff_image_type(head),
+        headers=headers,
+    )
 
 
 # 3. Get all ProductLines
-@router.get("/", response_model=List[ProductLine])
-async def get_all_product_lines(session: Session = Depends(get_session)):
-    product_lines = session.exec(select(ProductLine)).all()
-    return product_lines
+@router.get(
+    "/",
+    response_model=List[ProductLineRead],
+    dependencies=[Depends(conditional_get("productlines"))],
+)
+async def get_all_product_lines(
+    response: Response,
+    page: KeysetPage = Depends(),
+    fieldset: Optional[Fieldset] = Depends(
+        sparse_fieldset(ProductLine, exclude=("image",))
+    ),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if fieldset:
+        product_lines = await fetch_page(
+            session, fieldset.select(), ProductLine, page, response
+        )
+        return fieldset.render(product_lines, response)
+    product_lines = await fetch_page(
+        session,
+        select(ProductLine).options(*deferred_options(ProductLine)),
+        ProductLine,
+        page,
+        response,
+    )
+    return [product_line.model_dump() for product_line in product_lines]
 
 
 # 4. Update ProductLine
-@router.put("/{product_line_id}", response_model=ProductLine)
+@router.put("/{product_line_id}", response_model=ProductLineRead)
 async def update_product_line(
     product_line_id: str,
     updated_product_line: ProductLine,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    product_line = session.get(ProductLine, product_line_id)
+    product_line = await session.get(ProductLine, product_line_id)
     if not product_line:
         raise HTTPException(status_code=404, detail="ProductLine not found")
     updated_data = updated_product_line.model_dump(exclude_unset=True)
     for key, value in updated_data.items():
         setattr(product_line, key, value)
     session.add(product_line)
-    session.commit()
-    session.refresh(product_line)
+    await session.commit()
+    await table_versions.bump("productlines")
+    await session.refresh(product_line)
+    await product_line_cache.invalidate(product_line_id)
     return product_line
 
 
 # 5. Delete ProductLine
 @router.delete("/{product_line_id}")
 async def delete_product_line(
-    product_line_id: str, session: Session = Depends(get_session)
+    product_line_id: str, session: AsyncSession = Depends(get_async_session)
 ):
-    product_line = session.get(ProductLine, product_line_id)
+    product_line = await session.get(ProductLine, product_line_id)
     if not product_line:
         raise HTTPException(status_code=404, detail="ProductLine not found")
-    session.delete(product_line)
-    session.commit()
+    await session.delete(product_line)
+    await session.commit()
+    await table_versions.bump("productlines")
+    await product_line_cache.invalidate(product_line_id)
     return {"detail": "ProductLine deleted successfully"}
@@ -0,0 +1,131 @@
+"""
+Compare concurrent query throughput of the sync and async session paths.
+
+SQLite stands in for MySQL: a `db_sleep(ms)` SQL function is registered on
+every connection to emulate per-query server latency, and each simulated
+request runs it before listing the `orders` table. The sync path mirrors the
+old handlers (blocking `Session` inside `async def`), the async path uses
+`AsyncSession` over aiosqlite exactly like `core.database.get_async_session`.
+
+Usage:
+    python benchmarks/async_db_benchmark.py --requests 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+from sqlalchemy import event, func
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.models import Customer, Order  # noqa: E402
+
+
+def _register_sleep(dbapi_connection, connection_record):
+    dbapi_connection.create_function(
+        "db_sleep", 1, lambda ms: time.sleep(ms / 1000.0) or 0
+    )
+
+
+def seed(path: str, rows: int):
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(
+            Customer(
+                customer_number=1,
+                customer_name="Bench",
+                contact_last_name="Bench",
+                contact_first_name="Bench",
+                phone="0",
+                address_line1="-",
+                city="-",
+                country="-",
+            )
+        )
+        session.add_all(
+            Order(
+                order_number=n,
+                order_date=date.today(),
+                required_date=date.today(),
+                status="Shipped",
+                customer_number=1,
+            )
+            for n in range(rows)
+        )
+        session.commit()
+    engine.dispose()
+
+
+async def run_sync(path: str, total: int, concurrency: int, latency_ms: int):
+    engine = create_engine(f"sqlite:///{path}", pool_size=concurrency)
+    event.listen(engine, "connect", _register_sleep)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def handler():
+        async with semaphore:
+            with Session(engine) as session:
+                session.exec(select(func.db_sleep(latency_ms))).one()
+                return session.exec(select(Order)).all()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return elapsed
+
+
+async def run_async(path: str, total: int, concurrency: int, latency_ms: int):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=concurrency,
+    )
+    event.listen(engine.sync_engine, "connect", _register_sleep)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def handler():
+        async with semaphore:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                (await session.exec(select(func.db_sleep(latency_ms)))).one()
+                return (await session.exec(select(Order))).all()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path, args.rows)
+        for name, runner in (("sync Session", run_sync), ("AsyncSession", run_async)):
+            elapsed = asyncio.run(
+                runner(path, args.requests, args.concurrency, args.latency_ms)
+            )
+            print(
+                f"{name:<14} {args.requests} requests in {elapsed:.2f}s "
+                f"-> {args.requests / elapsed:.1f} req/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
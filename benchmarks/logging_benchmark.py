@@ -0,0 +1,146 @@
+"""
+Measure the per-call cost of a log statement with each JSON logging pipeline.
+
+Every pipeline writes the same `--records` records from `--threads` threads
+to a file, and the cost of the `logger.info` call is timed on the calling
+thread. The pipelines are:
+
+- "inline json": the old `get_service_logger` setup. A `StreamHandler`
+  formats with `json.dumps` and writes on the calling thread.
+- "inline orjson": the same, with orjson encoding.
+- "queue": the `core.custom_logging` setup. The call only enqueues, and a
+  `QueueListener` formats and writes. The queue holds `--max-queue` records,
+  by default all of them, and the overflow is dropped and counted.
+
+Records dropped by the queue were never written, so "us/record" is the time
+spent in `logger.info` divided by the records that were enqueued, and the
+enqueued and dropped counts are reported separately.
+
+For the queue, "drain" is how long the listener then needs to write out what
+is still queued. `--write-delay-us` makes every write block for that long, as
+a full stderr pipe or a slow log collector would.
+
+Usage:
+    python benchmarks/logging_benchmark.py --records 100000 --threads 4
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from logging.handlers import QueueListener
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.custom_logging import DroppingQueueHandler, JSONFormatter  # noqa: E402
+
+# The encoder JSONFormatter picks by default: orjson if installed, else json.dumps
+fast_dumps = JSONFormatter().dumps
+
+
+class SlowStream:
+    def __init__(self, stream, delay: float):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def file_handler(stream, dumps):
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JSONFormatter(dumps=dumps))
+    return handler
+
+
+def run(name: str, args, stream):
+    logger = logging.getLogger(f"bench.{name}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    listener = handler = None
+    if name == "inline json":
+        logger.addHandler(file_handler(stream, json.dumps))
+    elif name == "inline orjson":
+        logger.addHandler(file_handler(stream, fast_dumps))
+    else:
+        max_queue = args.records if args.max_queue is None else args.max_queue
+        handler = DroppingQueueHandler(queue.SimpleQueue(), max_queue)
+        listener = QueueListener(handler.queue, file_handler(stream, fast_dumps))
+        listener.start()
+        logger.addHandler(handler)
+
+    per_thread = args.records // args.threads
+    totals = [0.0] * args.threads
+
+    def worker(index):
+        started = time.perf_counter()
+        for number in range(per_thread):
+            logger.info("order %s shipped to customer %s", number, index)
+        totals[index] = time.perf_counter() - started
+
+    threads = [
+        threading.Thread(target=worker, args=(index,)) for index in range(args.threads)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    drain = 0.0
+    if listener is not None:
+        drain_started = time.perf_counter()
+        listener.stop()
+        drain = time.perf_counter() - drain_started
+    for existing in list(logger.handlers):
+        logger.removeHandler(existing)
+
+    calls = per_thread * args.threads
+    dropped = handler.dropped if handler is not None else 0
+    enqueued = calls - dropped
+    return {
+        "per_record": sum(totals) / enqueued * 1e6 if enqueued else float("nan"),
+        "rate": calls / elapsed,
+        "drain": drain * 1000,
+        "enqueued": enqueued,
+        "dropped": dropped,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument(
+        "--max-queue", type=int, default=None, help="defaults to --records"
+    )
+    parser.add_argument("--write-delay-us", type=float, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{'pipeline':<14} {'us/record':>9} {'calls/s':>10} {'drain ms':>9} "
+        f"{'enqueued':>9} {'dropped':>8}"
+    )
+    for name in ("inline json", "inline orjson", "queue"):
+        with tempfile.TemporaryFile("w") as stream:
+            if args.write_delay_us:
+                stream = SlowStream(stream, args.write_delay_us / 1e6)
+            result = run(name, args, stream)
+        print(
+            f"{name:<14} {result['per_record']:>9.2f} {result['rate']:>10.0f} "
+            f"{result['drain']:>9.1f} {result['enqueued']:>9} {result['dropped']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Measure login throughput and event-loop stalls with and without the hashing pool.
+
+A burst of `--logins` concurrent logins runs against users stored in SQLite.
+The "inline" path verifies with bcrypt directly in the coroutine, as
+`authenticate_user` used to. The "pool" path is the current
+`core.jwt_auth.authenticate_user`, which runs bcrypt on a `HashingPool` of
+`--workers` threads with a queue of `--max-queue`.
+
+While the logins run, a probe coroutine ticks every 10 ms and records the
+longest delay, i.e. how long any other request on the worker would have
+waited. Both paths then mint an access and a refresh token, as the auth
+service does, with an RSA key generated for the run. Users are stored with
+`--stored-rounds`. When that differs from
+`--rounds`, the pool path rehashes on first login; the report counts these.
+
+Usage:
+    python benchmarks/login_benchmark.py --logins 200 --rounds 10
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import rsa
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.jwt_auth as jwt_auth  # noqa: E402
+from core.hashing import HashingPool  # noqa: E402
+from core.jwks import SigningKey  # noqa: E402
+from core.models import User  # noqa: E402
+
+PASSWORD = "correct horse battery"
+
+
+def use_temporary_signing_key(directory: str):
+    """
+    Let this process mint tokens, as the auth service does, with a fresh key.
+    """
+    _, private_key = rsa.newkeys(2048)
+    path = os.path.join(directory, "signing.pem")
+    with open(path, "wb") as file:
+        file.write(private_key.save_pkcs1())
+    jwt_auth.signing_key = SigningKey(path)
+
+
+def seed(path: str, users: int, rounds: int):
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    hashed = context.hash(PASSWORD)
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            User(
+                user_id=n,
+                username=f"user{n}",
+                full_name=f"User {n}",
+                hashed_password=hashed,
+            )
+            for n in range(users)
+        )
+        session.commit()
+    engine.dispose()
+
+
+async def inline_login(session: AsyncSession, user_id: int, context: CryptContext):
+    user = await session.get(User, user_id)
+    if not user or not context.verify(PASSWORD, user.hashed_password):
+        raise HTTPException(status_code=401)
+    jwt_auth.create_access_token(data={"sub": str(user_id)})
+    jwt_auth.create_refresh_token(data={"sub": str(user_id)})
+
+
+async def run(mode: str, path: str, args):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=args.workers,
+        max_overflow=args.logins,
+    )
+    context = CryptContext(
+        schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=args.rounds
+    )
+    pool = HashingPool(context, workers=args.workers, max_queue=args.max_queue)
+    jwt_auth.hashing_pool = pool
+
+    latencies, statuses = [], {}
+    stalls = [0.0]
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            stalls[0] = max(stalls[0], time.perf_counter() - started - 0.01)
+
+    async def login(number: int):
+        started = time.perf_counter()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                user_id = number % args.users
+                if mode == "inline":
+                    await inline_login(session, user_id, context)
+                else:
+                    await jwt_auth.authenticate_user(user_id, PASSWORD, session)
+            status = 200
+        except HTTPException as exc:
+            status = exc.status_code
+        latencies.append(time.perf_counter() - started)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(login(n) for n in range(args.logins)))
+        elapsed = time.perf_counter() - started
+    finally:
+        done.set()
+        await probe_task
+        await engine.dispose()
+        pool.shutdown()
+
+    latencies.sort()
+    return {
+        "rate": statuses.get(200, 0) / elapsed,
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "stall": stalls[0] * 1000,
+        "statuses": statuses,
+        "peak_queued": pool.peak_queued,
+    }
+
+
+def count_rehashed(path: str, rounds: int) -> int:
+    engine = create_engine(f"sqlite:///{path}")
+    with Session(engine) as session:
+        hashes = session.exec(select(User.hashed_password)).all()
+    engine.dispose()
+    return sum(1 for hashed in hashes if hashed.startswith(f"$2b${rounds:02d}$"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--stored-rounds", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-queue", type=int, default=64)
+    args = parser.parse_args()
+    stored_rounds = args.stored_rounds or args.rounds
+
+    with tempfile.TemporaryDirectory() as keys:
+        use_temporary_signing_key(keys)
+        for mode in ("inline", "pool"):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "login.db")
+                seed(path, args.users, stored_rounds)
+                result = asyncio.run(run(mode, path, args))
+                rehashed = 0
+                if stored_rounds != args.rounds:
+                    rehashed = count_rehashed(path, args.rounds)
+            print(
+                f"{mode:<6} {result['rate']:7.1f} logins/s  "
+                f"p50 {result['p50']:7.1f} ms  p99 {result['p99']:7.1f} ms  "
+                f"max loop stall {result['stall']:7.1f} ms  "
+                f"peak queued {result['peak_queued']:3}  "
+                f"rehashed {rehashed:3}  statuses {result['statuses']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
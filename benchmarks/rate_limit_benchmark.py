@@ -0,0 +1,297 @@
+"""
+Benchmark the rate limiting algorithms for speed, footprint and accuracy.
+
+Each algorithm in `core.rate_limiting`, plus the leased two-tier token bucket,
+runs against both the Redis backend and the in-memory backend. Every
+algorithm is configured for the same `--limit` requests per `--period`
+seconds (see `core.rate_limit_middleware.RateLimitPolicy`). The Redis backend
+uses fakeredis unless `--redis-url` points at a real server.
+
+The report has three parts:
+
+- Throughput: `--requests` decisions spread over `--clients` keys from
+  `--concurrency` threads, on the real clock. Reports decisions/s, p50 and
+  p99 decision latency, and Redis commands and round trips per decision.
+- Memory: bytes of limiter state per client, after every client has sent
+  `--limit` requests. Measured with tracemalloc for the in-memory backend,
+  with MEMORY USAGE on a real Redis, and as approximate payload bytes on
+  fakeredis.
+- Accuracy: one client sending Poisson traffic at `--demand` times the limit
+  for `--periods` periods on a simulated clock. The admissions are compared
+  with an exact sliding window of `--limit` per `--period`. "peak" is the
+  most requests admitted in any window of one period, relative to the limit.
+
+Usage:
+    python benchmarks/rate_limit_benchmark.py --requests 20000 --concurrency 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import fakeredis
+import redis
+import redis.client
+import redis.connection
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.in_memory import InMemoryBackend  # noqa: E402
+from core.rate_limit_leases import LeasedTokenBucket  # noqa: E402
+from core.rate_limit_middleware import RateLimitPolicy, policy_decision  # noqa: E402
+from core.rate_limiting import RedisBackend  # noqa: E402
+
+ALGORITHMS = [
+    "token_bucket",
+    "leaky_bucket",
+    "fixed_window",
+    "sliding_window_log",
+    "sliding_window_counter",
+    "gcra",
+    "leased_token_bucket",
+]
+
+commands = 0
+round_trips = 0
+
+
+def _count_commands(execute_command):
+    def wrapper(self, *args, **options):
+        global commands
+        commands += 1
+        return execute_command(self, *args, **options)
+
+    return wrapper
+
+
+def _count_round_trips(send_packed_command):
+    def wrapper(self, *args, **kwargs):
+        global round_trips
+        round_trips += 1
+        return send_packed_command(self, *args, **kwargs)
+
+    return wrapper
+
+
+# Count every command issued (pipelined ones included) and every network write
+redis.client.Redis.execute_command = _count_commands(
+    redis.client.Redis.execute_command
+)
+redis.client.Pipeline.execute_command = _count_commands(
+    redis.client.Pipeline.execute_command
+)
+redis.connection.AbstractConnection.send_packed_command = _count_round_trips(
+    redis.connection.AbstractConnection.send_packed_command
+)
+
+
+class Limiter:
+    """
+    One algorithm on one backend, deciding for a key at a given time.
+    """
+
+    def __init__(
+        self, backend, algorithm: str, limit: int, period: float, simulated=False
+    ):
+        self.backend = backend
+        self.algorithm = algorithm
+        self.simulated = simulated
+        self.leases = None
+        self.last_sync = None
+        if algorithm == "leased_token_bucket":
+            self.leases = LeasedTokenBucket(
+                backend,
+                max_tokens=limit,
+                refill_rate=limit / period,
+                background_sync=not simulated,
+            )
+        else:
+            self.policy = RateLimitPolicy(algorithm, "*", "*", limit, period, algorithm)
+
+    def __call__(self, key: str, now: float) -> bool:
+        if self.leases is not None:
+            # On a simulated clock the lease sync has to follow that clock too
+            if self.simulated:
+                if self.last_sync is None:
+                    self.last_sync = now
+                while now - self.last_sync >= self.leases.sync_interval:
+                    self.last_sync += self.leases.sync_interval
+                    self.leases.sync(self.last_sync)
+            return self.leases.acquire(key, now)
+        return policy_decision(self.backend, self.policy, key, now)[0]
+
+    def close(self):
+        if self.leases is not None:
+            self.leases.close()
+
+
+def make_backend(kind: str, redis_url):
+    if kind == "memory":
+        return InMemoryBackend(max_keys=10_000_000), None
+    if redis_url:
+        client = redis.StrictRedis.from_url(redis_url, decode_responses=True)
+    else:
+        client = fakeredis.FakeStrictRedis(decode_responses=True)
+    client.flushdb()
+    return RedisBackend(client), client
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def measure_throughput(limiter, args, prefix):
+    per_thread = args.requests // args.concurrency
+    latencies = [[] for _ in range(args.concurrency)]
+
+    def worker(index):
+        rng = random.Random(index)
+        samples = latencies[index]
+        for _ in range(per_thread):
+            key = f"{prefix}:{rng.randrange(args.clients)}"
+            started = time.perf_counter()
+            limiter(key, time.time())
+            samples.append(time.perf_counter() - started)
+
+    threads = [
+        threading.Thread(target=worker, args=(index,))
+        for index in range(args.concurrency)
+    ]
+    commands_before, round_trips_before = commands, round_trips
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    decisions = per_thread * args.concurrency
+    samples = sorted(sample for thread in latencies for sample in thread)
+    return {
+        "rate": decisions / elapsed,
+        "p50": percentile(samples, 0.50) * 1e6,
+        "p99": percentile(samples, 0.99) * 1e6,
+        "commands": (commands - commands_before) / decisions,
+        "round_trips": (round_trips - round_trips_before) / decisions,
+    }
+
+
+def _redis_key_bytes(client, key):
+    try:
+        return client.memory_usage(key) or 0
+    except redis.ResponseError:
+        pass
+    # fakeredis has no MEMORY USAGE; count the stored payload instead
+    kind = client.type(key)
+    if kind == "hash":
+        return sum(len(k) + len(v) for k, v in client.hgetall(key).items())
+    if kind == "zset":
+        return sum(
+            len(member) + 8 for member, _ in client.zrange(key, 0, -1, withscores=True)
+        )
+    return len(client.get(key) or "")
+
+
+def measure_memory(kind, algorithm, args):
+    backend, client = make_backend(kind, args.redis_url)
+    limiter = Limiter(backend, algorithm, args.limit, args.period, simulated=True)
+    now = time.time()
+    step = args.period / args.limit / 2
+
+    if kind == "memory":
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+    for number in range(args.memory_clients):
+        for request in range(args.limit):
+            limiter(f"mem:{number}", now + request * step)
+    if kind == "memory":
+        used = sum(
+            stat.size_diff
+            for stat in tracemalloc.take_snapshot().compare_to(before, "filename")
+        )
+        tracemalloc.stop()
+    else:
+        used = sum(_redis_key_bytes(client, key) for key in client.scan_iter("*"))
+    limiter.close()
+    return used / args.memory_clients
+
+
+def measure_accuracy(kind, algorithm, args):
+    backend, _ = make_backend(kind, args.redis_url)
+    limiter = Limiter(backend, algorithm, args.limit, args.period, simulated=True)
+    rng = random.Random(42)
+    rate = args.demand * args.limit / args.period
+
+    now = 1_000_000.0
+    end = now + args.periods * args.period
+    ideal_log, admitted_log = deque(), deque()
+    ideal = admitted = peak = 0
+    while True:
+        now += rng.expovariate(rate)
+        if now >= end:
+            break
+        while ideal_log and ideal_log[0] <= now - args.period:
+            ideal_log.popleft()
+        if len(ideal_log) < args.limit:
+            ideal_log.append(now)
+            ideal += 1
+        if limiter("accuracy", now):
+            admitted += 1
+            admitted_log.append(now)
+            while admitted_log[0] <= now - args.period:
+                admitted_log.popleft()
+            peak = max(peak, len(admitted_log))
+    return {
+        "admitted": admitted,
+        "ideal": ideal,
+        "over": max(0, admitted - ideal) / ideal * 100,
+        "under": max(0, ideal - admitted) / ideal * 100,
+        "peak": peak / args.limit,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--period", type=float, default=10)
+    parser.add_argument("--memory-clients", type=int, default=200)
+    parser.add_argument("--demand", type=float, default=1.5)
+    parser.add_argument("--periods", type=int, default=30)
+    parser.add_argument("--backends", default="redis,memory")
+    parser.add_argument("--algorithms", default=",".join(ALGORITHMS))
+    parser.add_argument("--redis-url", help="use a real Redis instead of fakeredis")
+    args = parser.parse_args()
+
+    print(
+        f"{'backend':<7} {'algorithm':<23} {'dec/s':>9} {'p50 us':>8} {'p99 us':>8} "
+        f"{'cmd/dec':>7} {'rtt/dec':>7} {'B/client':>8} "
+        f"{'admitted':>8} {'ideal':>6} {'over%':>6} {'under%':>6} {'peak':>5}"
+    )
+    for kind in args.backends.split(","):
+        for algorithm in args.algorithms.split(","):
+            backend, _ = make_backend(kind, args.redis_url)
+            limiter = Limiter(backend, algorithm, args.limit, args.period)
+            speed = measure_throughput(limiter, args, f"bench:{algorithm}")
+            limiter.close()
+            memory = measure_memory(kind, algorithm, args)
+            accuracy = measure_accuracy(kind, algorithm, args)
+            print(
+                f"{kind:<7} {algorithm:<23} {speed['rate']:>9.0f} "
+                f"{speed['p50']:>8.1f} {speed['p99']:>8.1f} "
+                f"{speed['commands']:>7.2f} {speed['round_trips']:>7.2f} "
+                f"{memory:>8.0f} {accuracy['admitted']:>8} {accuracy['ideal']:>6} "
+                f"{accuracy['over']:>6.1f} {accuracy['under']:>6.1f} "
+                f"{accuracy['peak']:>5.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
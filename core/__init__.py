@@ -5,7 +5,6 @@ from .config import (
     SERVICE_NAME,
     DATABASE_URL,
     URL_PREFIX,
-    SECRET_KEY,
     ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     REFRESH_TOKEN_EXPIRE_DAYS,
@@ -26,7 +25,6 @@ __all__ = [
     "SERVICE_NAME",
     "DATABASE_URL",
     "URL_PREFIX",
-    "SECRET_KEY",
     "ALGORITHM",
     "ACCESS_TOKEN_EXPIRE_MINUTES",
     "REFRESH_TOKEN_EXPIRE_DAYS",
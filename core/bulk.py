@@ -0,0 +1,141 @@
+"""
+Bulk create/upsert of table models.
+
+Rows are validated one by one, then written in batches with a single
+multi-row `INSERT ... ON DUPLICATE KEY UPDATE` (MySQL) or
+`INSERT ... ON CONFLICT DO UPDATE` (SQLite) per batch and one commit per
+batch. When a batch is rejected by the database (e.g. a foreign key
+violation) it is rolled back and replayed row by row, so the caller gets an
+error for each offending row while the rest of the batch is still written.
+Elements that are not JSON objects are reported as row errors too. On any
+other database the endpoints answer 501 before reading a row.
+"""
+
+from typing import Any, List
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import DBAPIError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.schemas import BulkResult, BulkRowError
+
+UPSERT_DIALECTS = ("mysql", "sqlite")
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def upsert_statement(dialect_name: str, model, rows: List[dict]):
+    """
+    Build a multi-row upsert for the given dialect.
+
+    Args:
+        dialect_name (str): The SQLAlchemy dialect name of the connection.
+        model: The table model to write.
+        rows (List[dict]): Column values, one dict per row.
+
+    Returns:
+        The insert statement, updating every non primary key column on conflict.
+
+    Raises:
+        NotImplementedError: If the dialect has no upsert support here.
+    """
+    table = model.__table__
+    primary_key = [column.name for column in table.primary_key]
+    updatable = [column.name for column in table.columns if not column.primary_key]
+
+    if dialect_name == "mysql":
+        statement = mysql_insert(table).values(rows)
+        return statement.on_duplicate_key_update(
+            {name: statement.inserted[name] for name in updatable}
+        )
+    if dialect_name == "sqlite":
+        statement = sqlite_insert(table).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=primary_key,
+            set_={name: statement.excluded[name] for name in updatable},
+        )
+    raise NotImplementedError(f"Bulk upsert is not supported on {dialect_name}")
+
+
+async def _write_batch(
+    session: AsyncSession, model, batch: List[tuple], errors: List[BulkRowError]
+) -> int:
+    dialect_name = session.bind.dialect.name
+    try:
+        await session.exec(
+            upsert_statement(dialect_name, model, [row for _, row in batch])
+        )
+        await session.commit()
+        return len(batch)
+    except DBAPIError:
+        await session.rollback()
+
+    # Replay the rejected batch row by row to pinpoint the failing rows
+    written = 0
+    for index, row in batch:
+        try:
+            await session.exec(upsert_statement(dialect_name, model, [row]))
+            await session.commit()
+            written += 1
+        except DBAPIError as exc:
+            await session.rollback()
+            errors.append(BulkRowError(index=index, error=str(exc.orig)))
+    return written
+
+
+async def bulk_upsert(
+    session: AsyncSession, model, items: List[Any], batch_size: int
+) -> BulkResult:
+    """
+    Validate and upsert many rows of a table model.
+
+    Existing rows (matched on primary key) are overwritten with the submitted
+    values; omitted optional columns are written as NULL.
+
+    Args:
+        session (AsyncSession): The database session.
+        model: The table model to write.
+        items (List[Any]): The raw rows from the request body.
+        batch_size (int): The number of rows per INSERT statement and commit.
+
+    Returns:
+        BulkResult: Counts and per-row errors, indexed by position in `items`.
+
+    Raises:
+        HTTPException: 501 if the database has no upsert support here.
+    """
+    dialect_name = session.bind.dialect.name
+    if dialect_name not in UPSERT_DIALECTS:
+        raise HTTPException(
+            status_code=501, detail=f"Bulk upsert is not supported on {dialect_name}"
+        )
+
+    errors: List[BulkRowError] = []
+    valid: List[tuple] = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append(BulkRowError(index=index, error="Row must be a JSON object"))
+            continue
+        try:
+            valid.append((index, model.model_validate(item).model_dump()))
+        except ValidationError as exc:
+            errors.append(
+                BulkRowError(index=index, error=_format_validation_error(exc))
+            )
+
+    written = 0
+    for start in range(0, len(valid), batch_size):
+        written += await _write_batch(
+            session, model, valid[start : start + batch_size], errors
+        )
+
+    errors.sort(key=lambda error: error.index)
+    return BulkResult(received=len(items), written=written, errors=errors)
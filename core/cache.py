@@ -0,0 +1,216 @@
+"""
+Read-through caching for rarely changing reference data.
+
+`LRUCache` is a bounded in-process LRU with a per-entry TTL. `TieredCache`
+puts it in front of an optional shared Redis tier (enabled by setting
+`CACHE_REDIS_URL`), so a miss in one worker can still be served from Redis
+before falling back to the database. Writers call `invalidate()` after
+committing; the short local TTL bounds how long other workers may serve a
+stale entry.
+"""
+
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import redis.asyncio as redis
+
+from core.config import (
+    CACHE_MAX_ENTRIES,
+    CACHE_TTL_SECONDS,
+    CACHE_REDIS_URL,
+    CACHE_REDIS_TTL_SECONDS,
+)
+from core.custom_logging import get_service_logger
+
+logger = get_service_logger(__name__)
+
+redis_client = (
+    redis.StrictRedis.from_url(CACHE_REDIS_URL, decode_responses=True)
+    if CACHE_REDIS_URL
+    else None
+)
+
+
+def get_redis_client():
+    return redis_client
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU cache with a time-to-live per entry.
+    """
+
+    def __init__(
+        self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Look up a key.
+
+        Returns:
+            Tuple[bool, Any]: `(True, value)` on a hit, `(False, None)` on a miss
+            or when the entry has expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Store a value, evicting the least recently used entry when full.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def _encode(value: Any) -> str:
+    def default(obj):
+        if isinstance(obj, bytes):
+            return {"__bytes__": base64.b64encode(obj).decode()}
+        raise TypeError(f"Object of type {type(obj).__name__} is not cacheable")
+
+    return json.dumps(value, default=default)
+
+
+def _decode(raw: str) -> Any:
+    def object_hook(obj):
+        if set(obj) == {"__bytes__"}:
+            return base64.b64decode(obj["__bytes__"])
+        return obj
+
+    return json.loads(raw, object_hook=object_hook)
+
+
+class TieredCache:
+    """
+    Local LRU tier backed by an optional shared Redis tier.
+
+    Values must be JSON-compatible (dicts of primitives; bytes are supported).
+    Redis failures, and values that cannot be encoded or decoded, are logged,
+    counted in `redis_failures` and treated as misses so the cache never takes
+    a request down.
+    """
+
+    def __init__(
+        self, namespace: str, local: Optional[LRUCache] = None, redis_client=None
+    ):
+        self.namespace = namespace
+        self.local = local or LRUCache()
+        self.redis_client = redis_client
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_failures = 0
+
+    def _redis_key(self, key: Hashable) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value for `key`, or None on a miss.
+        """
+        found, value = self.local.get(key)
+        if found:
+            return value
+        if self.redis_client is None:
+            return None
+        try:
+            raw = await self.redis_client.get(self._redis_key(key))
+        except redis.RedisError:
+            logger.warning("Cache read failed for %s", self._redis_key(key))
+            self.redis_failures += 1
+            self.redis_misses += 1
+            return None
+        if raw is None:
+            self.redis_misses += 1
+            return None
+        try:
+            value = _decode(raw)
+        except ValueError:
+            logger.warning("Cache entry %s is unreadable", self._redis_key(key))
+            self.redis_failures += 1
+            self.redis_misses += 1
+            return None
+        self.redis_hits += 1
+        self.local.set(key, value)
+        return value
+
+    async def set(self, key: Hashable, value: Any):
+        self.local.set(key, value)
+        if self.redis_client is None:
+            return
+        try:
+            raw = _encode(value)
+        except (TypeError, ValueError):
+            logger.warning("Cache value for %s is not encodable", self._redis_key(key))
+            self.redis_failures += 1
+            return
+        try:
+            await self.redis_client.set(
+                self._redis_key(key), raw, ex=CACHE_REDIS_TTL_SECONDS
+            )
+        except redis.RedisError:
+            logger.warning("Cache write failed for %s", self._redis_key(key))
+            self.redis_failures += 1
+
+    async def invalidate(self, *keys: Hashable):
+        """
+        Drop keys from both tiers. Call after the write has been committed.
+        """
+        for key in keys:
+            self.local.delete(key)
+        if self.redis_client is None or not keys:
+            return
+        try:
+            await self.redis_client.delete(*(self._redis_key(key) for key in keys))
+        except redis.RedisError:
+            logger.warning("Cache invalidation failed for %s", self.namespace)
+            self.redis_failures += 1
+
+    def stats(self) -> Dict[str, int]:
+        local = self.local.stats()
+        return {
+            "size": local["size"],
+            "local_hits": local["hits"],
+            "redis_hits": self.redis_hits,
+            "redis_failures": self.redis_failures,
+            "misses": self.redis_misses if self.redis_client else local["misses"],
+        }
+
+
+# Product catalog caches shared by the ProductService routers
+product_cache = TieredCache("product", redis_client=redis_client)
+product_line_cache = TieredCache("product_line", redis_client=redis_client)
@@ -1,13 +1,48 @@
-import logging
+"""
+JSON logging that keeps formatting and I/O off the calling thread.
+
+Every service logger hands its records to one process-wide `QueueHandler`.
+The calling thread only interpolates the message and enqueues the record. A
+`QueueListener` thread then formats each record as JSON and writes it to
+stderr. JSON is encoded with orjson when it is installed.
+
+The queue holds at most `LOG_QUEUE_SIZE` records. When it is full, new
+records are dropped and counted rather than blocking the caller;
+`logging_stats()` reports the count. Queued records are flushed at exit.
+"""
+
+import atexit
 import json
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, Optional
+
+from core.config import LOG_QUEUE_SIZE
+
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+except ImportError:  # orjson is optional
+    _dumps = json.dumps
 
 
 class JSONFormatter(logging.Formatter):
     """
     Custom JSON formatter for logging.
-    Formats log records as JSON objects.
+    Formats log records as JSON objects, with `dumps` if given, else with
+    orjson when it is installed.
     """
 
+    def __init__(self, *args, dumps: Optional[Callable[[dict], str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dumps = dumps or _dumps
+
     def format(self, record):
         """
         Format the specified record as a JSON object.
@@ -26,32 +61,111 @@ class JSONFormatter(logging.Formatter):
             "filename": record.filename,
             "lineno": record.lineno,
         }
-        return json.dumps(log_record)
+        return self.dumps(log_record)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that drops and counts records once `max_queue` are waiting.
+
+    The bound is checked without a lock, so concurrent callers may overshoot
+    it by a few records; in exchange the unbounded C `SimpleQueue` is used.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_queue: int):
+        super().__init__(log_queue)
+        self.max_queue = max_queue
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Interpolate now, while the arguments still hold their current values;
+        # everything else is formatted on the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self.queue.qsize() >= self.max_queue:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+_console_handler = logging.StreamHandler()
+_console_handler.setLevel(logging.DEBUG)
+_console_handler.setFormatter(JSONFormatter())
+
+_queue_handler = DroppingQueueHandler(queue.SimpleQueue(), LOG_QUEUE_SIZE)
+_queue_handler.setLevel(logging.DEBUG)
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def _start_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = QueueListener(
+                _queue_handler.queue, _console_handler, respect_handler_level=True
+            )
+            _listener.start()
+
+
+def _stop_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            # Writes out everything still queued before returning
+            _listener.stop()
+            _listener = None
+
+
+def _reset_after_fork():
+    # The listener thread does not survive a fork; give the child its own
+    global _listener, _listener_lock
+    _listener_lock = threading.Lock()
+    had_listener = _listener is not None
+    _listener = None
+    _queue_handler.queue = queue.SimpleQueue()
+    _queue_handler.dropped = 0
+    if had_listener:
+        _start_listener()
+
+
+atexit.register(_stop_listener)
+os.register_at_fork(after_in_child=_reset_after_fork)
 
 
 def get_service_logger(name: str):
     """
     Get a configured logger with a JSON formatter.
 
+    Calling it again for the same name returns the same logger without adding
+    another handler.
+
     Args:
         name (str): The name of the logger.
 
     Returns:
         logging.Logger: The configured logger.
     """
+    _start_listener()
+
     # Set up the logger
     logger = logging.getLogger(name)
     logger.setLevel(logging.DEBUG)
 
-    # Create a console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.DEBUG)
+    # Route its records through the shared queue
+    if _queue_handler not in logger.handlers:
+        logger.addHandler(_queue_handler)
 
-    # Create and set the JSON formatter
-    json_formatter = JSONFormatter()
-    console_handler.setFormatter(json_formatter)
+    return logger
 
-    # Add the handler to the logger
-    logger.addHandler(console_handler)
 
-    return logger
+def logging_stats() -> Dict[str, int]:
+    return {
+        "queued": _queue_handler.queue.qsize(),
+        "max_queue": LOG_QUEUE_SIZE,
+        "dropped": _queue_handler.dropped,
+    }
@@ -1,11 +1,41 @@
 from sqlmodel import create_engine, Session
-from core.config import DATABASE_URL
-from typing import Generator
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from core.config import (
+    DATABASE_URL,
+    ASYNC_DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+)
+from typing import AsyncGenerator, Generator
 
-engine = create_engine(DATABASE_URL, pool_size=10, max_overflow=20, future=True)
+# Sync engine, kept for scripts and other non-async callers
+engine = create_engine(
+    DATABASE_URL, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, future=True
+)
+
+# Async engine used by the service routers
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+)
 
 
 # Function to get a session
 def get_session() -> Generator[Session, None, None]:
     with Session(engine) as session:
         yield session
+
+
+# Function to get an async session
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Yield an `AsyncSession` bound to the async engine.
+
+    Objects are not expired on commit so handlers can return them after
+    `commit()` without triggering a lazy refresh outside the event loop.
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
@@ -0,0 +1,113 @@
+"""
+Conditional GET support (ETag / If-None-Match) for reference data.
+
+Every table served this way has a version that the routers bump after each
+committed create, update or delete. The ETag of a response is derived from
+the table version and the request path and query string only, so an
+unchanged poll is answered with `304 Not Modified` before the database
+session is used or anything is serialized.
+
+With `CACHE_REDIS_URL` configured, versions live in Redis and are shared by
+every worker. Without it they are per process and additionally roll over
+every `CACHE_TTL_SECONDS`, bounding how long another worker can keep
+answering 304 after a write it did not see.
+"""
+
+import hashlib
+import time
+import uuid
+from typing import Dict, Optional
+
+import redis.asyncio as redis
+from fastapi import Header, HTTPException, Request, Response
+
+from core.cache import get_redis_client
+from core.config import CACHE_TTL_SECONDS
+from core.custom_logging import get_service_logger
+
+logger = get_service_logger(__name__)
+
+
+class TableVersions:
+    """
+    Per-table change counters, stored in Redis when available.
+    """
+
+    def __init__(self, redis_client=None):
+        self.redis_client = redis_client
+        self._boot_id = uuid.uuid4().hex[:8]
+        self._local: Dict[str, int] = {}
+
+    def _redis_key(self, table: str) -> str:
+        return f"table_version:{table}"
+
+    async def get(self, table: str) -> Optional[str]:
+        """
+        Return the current version of `table`, or None if it is unknown.
+        """
+        if self.redis_client is None:
+            epoch = int(time.time() // CACHE_TTL_SECONDS)
+            return f"{self._boot_id}.{epoch}.{self._local.get(table, 0)}"
+        try:
+            version = await self.redis_client.get(self._redis_key(table))
+        except redis.RedisError:
+            logger.warning("Could not read version of %s", table)
+            return None
+        return version or "0"
+
+    async def bump(self, table: str):
+        """
+        Record a committed change to `table`.
+        """
+        self._local[table] = self._local.get(table, 0) + 1
+        if self.redis_client is None:
+            return
+        try:
+            await self.redis_client.incr(self._redis_key(table))
+        except redis.RedisError:
+            logger.warning("Could not bump version of %s", table)
+
+
+table_versions = TableVersions(get_redis_client())
+
+
+def make_etag(tag: str, version: str, request: Request) -> str:
+    """
+    Build a strong ETag for a request against a table version.
+    """
+    digest = hashlib.blake2b(
+        f"{request.url.path}?{request.url.query}".encode(), digest_size=8
+    ).hexdigest()
+    return f'"{tag}-{version}-{digest}"'
+
+
+def conditional_get(*tables: str):
+    """
+    Build a route dependency answering `If-None-Match` polls.
+
+    Args:
+        *tables (str): Every table the response is built from; a change to any
+            of them produces a new ETag.
+
+    Use it in the route's `dependencies=[...]` so it runs before the session
+    dependency and the handler. On a match it raises a 304 carrying the ETag;
+    otherwise it sets the ETag header on the response.
+    """
+    tag = "+".join(tables)
+
+    async def dependency(
+        request: Request,
+        response: Response,
+        if_none_match: Optional[str] = Header(None),
+    ):
+        versions = [await table_versions.get(table) for table in tables]
+        if None in versions:
+            return
+        etag = make_etag(tag, ".".join(versions), request)
+        if if_none_match:
+            candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+            if etag in candidates or "*" in candidates:
+                raise HTTPException(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
+    return dependency
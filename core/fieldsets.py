@@ -0,0 +1,137 @@
+"""
+Sparse fieldsets (`?fields=a,b,c`) for list and detail endpoints.
+
+The requested fields are turned into a column-only `select(...)`, so only
+those columns are read from the database, and the rows are validated and
+serialized with a response model built on the fly for that exact field
+combination. Generated models are cached per combination.
+
+The primary key columns are always included so keyset pagination keeps
+working and every item stays identifiable.
+"""
+
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, Query, Response
+from pydantic import TypeAdapter, create_model
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.pagination import primary_key_columns
+
+
+@lru_cache(maxsize=512)
+def partial_adapters(model, names: Tuple[str, ...]) -> Tuple[TypeAdapter, TypeAdapter]:
+    """
+    Build (and cache) item and list adapters for a subset of a model's fields.
+
+    Args:
+        model: The table model.
+        names (Tuple[str, ...]): The normalized field names.
+
+    Returns:
+        Tuple[TypeAdapter, TypeAdapter]: Adapters for one item and for a list.
+    """
+    partial = create_model(
+        f"{model.__name__}Fields",
+        **{name: (model.model_fields[name].annotation, ...) for name in names},
+    )
+    return TypeAdapter(partial), TypeAdapter(List[partial])
+
+
+def _as_mapping(row) -> dict:
+    if isinstance(row, dict):
+        return row
+    return dict(row._mapping)
+
+
+def _json_response(content: bytes, response: Response) -> Response:
+    headers = {
+        key: value
+        for key, value in response.headers.items()
+        if key.lower() != "content-length"
+    }
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+class Fieldset:
+    """
+    A validated, normalized selection of a model's columns.
+    """
+
+    def __init__(self, model, names: Tuple[str, ...]):
+        self.model = model
+        self.names = names
+
+    @property
+    def columns(self) -> list:
+        return [getattr(self.model, name) for name in self.names]
+
+    def select(self):
+        """
+        Return a `select` of only the selected columns.
+        """
+        return select(*self.columns)
+
+    async def fetch_one(self, session: AsyncSession, *conditions):
+        """
+        Fetch the selected columns of a single row, or None.
+        """
+        return (await session.exec(self.select().where(*conditions))).first()
+
+    def render(self, rows, response: Response) -> Response:
+        """
+        Serialize a list of rows, keeping headers set on `response`.
+        """
+        _, list_adapter = partial_adapters(self.model, self.names)
+        items = list_adapter.validate_python([_as_mapping(row) for row in rows])
+        return _json_response(list_adapter.dump_json(items), response)
+
+    def render_one(self, row, response: Response) -> Response:
+        """
+        Serialize a single row (or a cached dict), keeping headers set on
+        `response`.
+        """
+        item_adapter, _ = partial_adapters(self.model, self.names)
+        data = _as_mapping(row)
+        item = item_adapter.validate_python({name: data[name] for name in self.names})
+        return _json_response(item_adapter.dump_json(item), response)
+
+
+def sparse_fieldset(
+    model, exclude: Tuple[str, ...] = ()
+) -> Callable[..., Optional[Fieldset]]:
+    """
+    Build a dependency parsing the `fields` query parameter for `model`.
+
+    Args:
+        model: The table model served by the route.
+        exclude (Tuple[str, ...]): Columns that may not be requested.
+
+    Returns:
+        Callable: A dependency returning a `Fieldset`, or None when the
+        parameter is absent and the full model should be returned.
+    """
+    columns = [
+        column.key for column in model.__table__.columns if column.key not in exclude
+    ]
+    primary_key = [column.key for column in primary_key_columns(model)]
+    description = "Comma separated fields to return: " + ", ".join(columns)
+
+    def dependency(
+        fields: Optional[str] = Query(None, description=description)
+    ) -> Optional[Fieldset]:
+        if not fields:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested.difference(columns)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+            )
+        requested.update(primary_key)
+        return Fieldset(model, tuple(name for name in columns if name in requested))
+
+    return dependency
@@ -0,0 +1,126 @@
+"""
+Password hashing off the event loop.
+
+A bcrypt hash or verify costs tens to hundreds of milliseconds of CPU. Running
+it inline in an `async def` handler stalls every other request on the worker.
+`HashingPool` runs it on a dedicated, bounded thread pool instead. When the
+pool and its queue are full, new work is refused with 503 and `Retry-After`,
+so a login storm sheds load instead of building an unbounded backlog.
+
+The bcrypt cost comes from `BCRYPT_ROUNDS`. Hashes made with other parameters
+are reported by `verify_and_update`, so they can be upgraded on the next
+successful login.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from core.config import BCRYPT_ROUNDS, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_WORKERS
+
+# Password hashing context
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS
+)
+
+
+class HashingPool:
+    """
+    Bounded executor for password hashing with queue-depth metrics.
+
+    Work counts as pending until it finishes on the pool, even when the request
+    awaiting it has been cancelled, so the 503 cutoff sees the real load.
+    """
+
+    def __init__(
+        self,
+        context: CryptContext = pwd_context,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_queue: int = PASSWORD_HASH_MAX_QUEUE,
+    ):
+        self.context = context
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.pending - self.workers)
+
+    async def run(self, func: Callable, *args):
+        """
+        Run `func(*args)` on the pool, or raise 503 if the queue is full.
+        """
+        with self._lock:
+            if self.pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many concurrent logins, try again shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        try:
+            future = self._executor.submit(func, *args)
+        except RuntimeError:
+            # The pool has been shut down
+            with self._lock:
+                self.pending -= 1
+            raise
+        future.add_done_callback(self._finished)
+        return await asyncio.wrap_future(future)
+
+    def _finished(self, future: Future):
+        # Runs on the worker thread once `func` returns, or when work that
+        # never started is cancelled
+        with self._lock:
+            self.pending -= 1
+            if not future.cancelled():
+                self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self.run(self.context.verify, password, hashed_password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password.
+
+        Returns:
+            Tuple[bool, Optional[str]]: Whether it matched, and a replacement hash
+            if the stored one was made with outdated parameters.
+        """
+        return await self.run(self.context.verify_and_update, password, hashed_password)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "in_flight": min(self.pending, self.workers),
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+hashing_pool = HashingPool()
@@ -0,0 +1,179 @@
+"""
+In-process backend for the rate limiters in `core.rate_limiting`.
+
+`InMemoryBackend` implements the same interface as `RedisBackend`, but keeps
+the per-key state in a bounded dict inside the worker. Decisions need no
+network round trip, which suits single-node deployments and tests. Limits are
+enforced per process, not across workers.
+
+Every entry carries an expiry time and is dropped lazily when it is next
+touched. Once the store is full, the least recently used key is evicted. That
+resets the evicted client's limit, so size the store well above the number of
+active clients.
+"""
+
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import RATE_LIMIT_MAX_KEYS
+
+
+class InMemoryBackend:
+    """
+    Thread-safe, size-bounded rate limit state with lazy expiry.
+
+    Each decision holds the lock only for a dict lookup and a little arithmetic.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self.evictions = 0
+        self._state: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self, key: str, now: float) -> Optional[Any]:
+        entry = self._state.get(key)
+        if entry is None:
+            return None
+        expires_at, state = entry
+        if expires_at <= now:
+            del self._state[key]
+            return None
+        self._state.move_to_end(key)
+        return state
+
+    def _store(self, key: str, state: Any, expires_at: float) -> None:
+        self._state[key] = (expires_at, state)
+        self._state.move_to_end(key)
+        while len(self._state) > self.max_keys:
+            self._state.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._state.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._state),
+            "max_keys": self.max_keys,
+            "evictions": self.evictions,
+        }
+
+    def token_bucket(
+        self,
+        key: str,
+        max_tokens: float,
+        refill_rate: float,
+        now: float,
+        cost: float = 1,
+    ) -> Tuple[bool, float]:
+        with self._lock:
+            tokens, last_refill_time = self._load(key, now) or (max_tokens, now)
+            elapsed = max(0.0, now - last_refill_time)
+            tokens = min(max_tokens, tokens + elapsed * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._store(key, (tokens, now), now + max_tokens / refill_rate)
+        return allowed, tokens
+
+    def lease_tokens(
+        self,
+        leases: List[Tuple[str, float, float, int, float]],
+        now: float,
+    ) -> List[int]:
+        granted = []
+        with self._lock:
+            for key, max_tokens, refill_rate, requested, returned in leases:
+                tokens, last_refill_time = self._load(key, now) or (max_tokens, now)
+                elapsed = max(0.0, now - last_refill_time)
+                tokens = min(max_tokens, tokens + elapsed * refill_rate + returned)
+                grant = max(0, min(requested, int(tokens)))
+                self._store(
+                    key, (tokens - grant, now), now + max_tokens / refill_rate
+                )
+                granted.append(grant)
+        return granted
+
+    def leaky_bucket(
+        self, key: str, capacity: float, leak_rate: float, now: float
+    ) -> Tuple[bool, float]:
+        with self._lock:
+            requests, last_check = self._load(key, now) or (0.0, now)
+            elapsed = max(0.0, now - last_check)
+            requests = max(0.0, requests - elapsed * leak_rate)
+            allowed = requests + 1 <= capacity
+            if allowed:
+                requests += 1
+            self._store(key, (requests, now), now + capacity / leak_rate)
+        return allowed, requests
+
+    def fixed_window(
+        self, key: str, max_requests: int, window_seconds: int, now: float
+    ) -> Tuple[bool, int]:
+        window = int(now // window_seconds)
+        with self._lock:
+            state = self._load(key, now)
+            requests = state[1] if state and state[0] == window else 0
+            allowed = requests < max_requests
+            if allowed:
+                requests += 1
+                self._store(key, (window, requests), (window + 1) * window_seconds)
+        return allowed, requests
+
+    def sliding_window_log(
+        self, key: str, max_requests: int, window_seconds: int, now: float
+    ) -> Tuple[bool, int]:
+        with self._lock:
+            log = self._load(key, now)
+            if log is None or log.maxlen != max_requests:
+                log = deque(log or (), maxlen=max_requests)
+            while log and log[0] <= now - window_seconds:
+                log.popleft()
+            allowed = len(log) < max_requests
+            if allowed:
+                log.append(now)
+            self._store(key, log, now + window_seconds)
+        return allowed, len(log)
+
+    def sliding_window_counter(
+        self,
+        key: str,
+        max_requests: int,
+        window_seconds: int,
+        sub_window_seconds: int,
+        now: float,
+    ) -> Tuple[bool, int]:
+        current = int(now) // sub_window_seconds
+        sub_windows = -(-window_seconds // sub_window_seconds)
+        with self._lock:
+            counts = self._load(key, now) or {}
+            counts = {
+                index: count
+                for index, count in counts.items()
+                if index > current - sub_windows
+            }
+            total = sum(counts.values())
+            allowed = total < max_requests
+            if allowed:
+                counts[current] = counts.get(current, 0) + 1
+                total += 1
+            self._store(key, counts, now + window_seconds)
+        return allowed, total
+
+    def gcra(
+        self, key: str, emission_interval: float, burst: int, now: float
+    ) -> Tuple[bool, int, float, float]:
+        with self._lock:
+            tat = max(self._load(key, now) or now, now)
+            new_tat = tat + emission_interval
+            diff = now - (new_tat - burst * emission_interval)
+            if diff < 0:
+                return False, 0, -diff, tat - now
+            self._store(key, new_tat, new_tat)
+        return True, int(diff // emission_interval), 0.0, new_tat - now
@@ -0,0 +1,93 @@
+"""
+`?include=` support for eager loading related models on list endpoints.
+
+Each endpoint declares the relationships a client may ask for. Many-to-one
+relationships are loaded with `joinedload` (same statement) and one-to-many
+relationships with `selectinload` (one extra `IN` query per relationship), so
+the number of SQL statements per request is fixed no matter how many rows
+are returned.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy.orm import defer, joinedload, selectinload
+
+
+def include_dependency(allowed: Dict[str, str]) -> Callable[..., List[str]]:
+    """
+    Build a dependency parsing a comma separated `include` query parameter.
+
+    Args:
+        allowed (Dict[str, str]): Maps public include names to relationship
+            attribute names on the model.
+
+    Returns:
+        Callable: A dependency returning the requested relationship names.
+    """
+    description = "Comma separated related objects to embed: " + ", ".join(allowed)
+
+    def dependency(
+        include: Optional[str] = Query(None, description=description)
+    ) -> List[str]:
+        if not include:
+            return []
+        relations = []
+        for name in include.split(","):
+            name = name.strip()
+            if not name:
+                continue
+            if name not in allowed:
+                raise HTTPException(status_code=400, detail=f"Unknown include '{name}'")
+            if allowed[name] not in relations:
+                relations.append(allowed[name])
+        return relations
+
+    return dependency
+
+
+def deferred_options(model) -> list:
+    """
+    Return `defer()` options for the model's `__deferred_columns__`, if any.
+    """
+    return [
+        defer(getattr(model, column))
+        for column in getattr(model, "__deferred_columns__", ())
+    ]
+
+
+def eager_load_options(model, relations: List[str]) -> list:
+    """
+    Return loader options for the requested relationships.
+
+    Args:
+        model: The table model being queried.
+        relations (List[str]): Relationship attribute names.
+
+    Returns:
+        list: Options to pass to `select(...).options(...)`.
+    """
+    options = []
+    for relation in relations:
+        attribute = getattr(model, relation)
+        loader = selectinload if attribute.property.uselist else joinedload
+        target = attribute.property.mapper.class_
+        options.append(loader(attribute).options(*deferred_options(target)))
+    return options
+
+
+def dump_with_includes(instance, relations: List[str]) -> dict:
+    """
+    Serialize a model and its eagerly loaded relationships to a dict.
+
+    Only the requested relationships are read, so no lazy load is triggered
+    for the others. Deferred columns that were not loaded are left out.
+    """
+    data = instance.model_dump()
+    for relation in relations:
+        value = getattr(instance, relation)
+        if isinstance(value, list):
+            data[relation] = [item.model_dump() for item in value]
+        else:
+            data[relation] = value.model_dump() if value is not None else None
+    return data
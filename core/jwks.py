@@ -0,0 +1,298 @@
+"""
+Asymmetric token keys: the auth service's signing key and a cached JWKS for
+every verifier.
+
+Tokens are signed with `ALGORITHM` (RS256). Only the auth service can mint
+them, because only it is configured with `JWT_PRIVATE_KEY_PATH`. Each token
+names its key in the `kid` header, which is the RFC 7638 thumbprint of the
+public key. A service holding that key mounts `jwks_router` (see
+`core.lifespan.include_auth_routes`) to publish the public keys as a JWKS
+document. The published set is its signing key plus every PEM in
+`JWT_PUBLIC_KEYS_DIR`.
+
+Every service verifies tokens locally against `JWKSCache`, an in-memory copy
+of that document. A background thread, run by `core.jwt_auth.auth_lifespan`,
+refreshes it every `JWKS_REFRESH_SECONDS`. Keys are fetched from `JWKS_URL`, or read from the
+local files when it is unset. Requests never wait on a fetch. A token with an
+unknown `kid` is rejected, and it wakes the thread for an early refresh, at
+most once per `JWKS_MIN_REFRESH_SECONDS`. The same holds for every token
+until the first refresh has completed.
+
+Rotating keys needs no restart:
+
+1. Put the new public key in `JWT_PUBLIC_KEYS_DIR`. Wait
+   `JWKS_REFRESH_SECONDS` so that every service has it.
+2. Replace the private key file. The auth service signs with the new key
+   from its next token on.
+3. Once the tokens signed with the old key have expired, delete the old
+   public key.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from jose import jwk
+from jose.backends.base import Key
+from jose.exceptions import JWKError
+
+from core.config import (
+    ALGORITHM,
+    JWKS_MIN_REFRESH_SECONDS,
+    JWKS_REFRESH_SECONDS,
+    JWKS_TIMEOUT_SECONDS,
+    JWKS_URL,
+    JWT_PRIVATE_KEY_PATH,
+    JWT_PUBLIC_KEYS_DIR,
+)
+from core.custom_logging import get_service_logger
+
+logger = get_service_logger(__name__)
+
+
+def key_id(public_jwk: dict) -> str:
+    """
+    RFC 7638 thumbprint of an RSA public key, used as its `kid`.
+    """
+    members = {name: public_jwk[name] for name in ("e", "kty", "n")}
+    digest = hashlib.sha256(
+        json.dumps(members, separators=(",", ":"), sort_keys=True).encode()
+    ).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def public_jwk(pem: str) -> dict:
+    """
+    The public JWK, with its `kid`, of a PEM private or public key.
+    """
+    public = jwk.construct(pem, ALGORITHM).public_key().to_dict()
+    entry = {name: public[name] for name in ("kty", "n", "e")}
+    entry.update(alg=ALGORITHM, use="sig", kid=key_id(public))
+    return entry
+
+
+class SigningKey:
+    """
+    The auth service's private key, reloaded whenever its file changes.
+    """
+
+    def __init__(self, path: Optional[str] = JWT_PRIVATE_KEY_PATH):
+        self.path = path
+        self._loaded: Optional[Tuple[int, str, Key, dict]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return bool(self.path)
+
+    def _load(self) -> Tuple[str, Key, dict]:
+        if not self.path:
+            raise RuntimeError("Only the auth service can sign tokens")
+        mtime = os.stat(self.path).st_mtime_ns
+        loaded = self._loaded
+        if loaded is None or loaded[0] != mtime:
+            with self._lock:
+                loaded = self._loaded
+                if loaded is None or loaded[0] != mtime:
+                    with open(self.path) as file:
+                        pem = file.read()
+                    public = public_jwk(pem)
+                    loaded = (mtime, public["kid"], jwk.construct(pem, ALGORITHM), public)
+                    self._loaded = loaded
+                    logger.info("Loaded signing key %s", public["kid"])
+        return loaded[1], loaded[2], loaded[3]
+
+    def get(self) -> Tuple[str, Key]:
+        """
+        Returns:
+            Tuple[str, Key]: The `kid` and the private key to sign with.
+
+        Raises:
+            RuntimeError: If this service has no signing key.
+        """
+        kid, key, _ = self._load()
+        return kid, key
+
+    def public(self) -> Optional[dict]:
+        return self._load()[2] if self.available else None
+
+
+signing_key = SigningKey()
+
+# Published keys by file name, keyed on the directory's (name, mtime) listing
+_published: Tuple[tuple, List[dict]] = ((), [])
+
+
+def _published_keys() -> List[dict]:
+    global _published
+    if not JWT_PUBLIC_KEYS_DIR:
+        return []
+    listing = tuple(
+        sorted(
+            (entry.name, entry.stat().st_mtime_ns)
+            for entry in os.scandir(JWT_PUBLIC_KEYS_DIR)
+            if entry.name.endswith(".pem")
+        )
+    )
+    if listing != _published[0]:
+        keys = []
+        for name, _ in listing:
+            with open(os.path.join(JWT_PUBLIC_KEYS_DIR, name)) as file:
+                try:
+                    keys.append(public_jwk(file.read()))
+                except JWKError:
+                    logger.warning("Skipping unreadable public key %s", name)
+        _published = (listing, keys)
+    return _published[1]
+
+
+def jwks_document() -> dict:
+    """
+    The JWKS of every key a valid token may currently be signed with.
+    """
+    keys = {entry["kid"]: entry for entry in _published_keys()}
+    current = signing_key.public()
+    if current is not None:
+        keys[current["kid"]] = current
+    return {"keys": list(keys.values())}
+
+
+jwks_router = APIRouter()
+
+
+@jwks_router.get("/.well-known/jwks.json", include_in_schema=False)
+async def jwks():
+    return JSONResponse(
+        jwks_document(),
+        headers={"Cache-Control": f"public, max-age={JWKS_MIN_REFRESH_SECONDS}"},
+    )
+
+
+class JWKSCache:
+    """
+    In-memory copy of the auth service's JWKS, refreshed in the background.
+
+    `on_removed` is called after a refresh drops a key, so that anything
+    verified with that key can be forgotten.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = JWKS_URL,
+        refresh_interval: float = JWKS_REFRESH_SECONDS,
+        min_refresh_interval: float = JWKS_MIN_REFRESH_SECONDS,
+        timeout: float = JWKS_TIMEOUT_SECONDS,
+        on_removed: Optional[Callable[[], None]] = None,
+    ):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.on_removed = on_removed
+        self.refreshes = 0
+        self.failures = 0
+        self.unknown_kids = 0
+        self._keys: Dict[str, Key] = {}
+        self._last_refresh: Optional[float] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def fetch(self) -> dict:
+        if self.url is None:
+            return jwks_document()
+        response = httpx.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def refresh(self) -> None:
+        """
+        Replace the cached keys with the current document; keep them on failure.
+        """
+        self._last_refresh = time.monotonic()
+        try:
+            document = self.fetch()
+        except (httpx.HTTPError, OSError, ValueError):
+            self.failures += 1
+            logger.exception("JWKS refresh failed; keeping the cached keys")
+            return
+
+        current = self._keys
+        keys = {}
+        for entry in document.get("keys", []):
+            kid = entry.get("kid")
+            if not isinstance(kid, str) or entry.get("alg", ALGORITHM) != ALGORITHM:
+                continue
+            try:
+                keys[kid] = current.get(kid) or jwk.construct(entry, ALGORITHM)
+            except JWKError:
+                logger.warning("Skipping unusable JWKS key %s", kid)
+        with self._lock:
+            removed = self._keys.keys() - keys.keys()
+            self._keys = keys
+            self.refreshes += 1
+        if removed and self.on_removed is not None:
+            self.on_removed()
+
+    def get(self, kid: str) -> Optional[Key]:
+        """
+        The verification key for `kid`, or None if it is unknown.
+
+        Never fetches; an unknown `kid` only wakes the background refresh.
+        """
+        if self._thread is None:
+            self.start()
+        key = self._keys.get(kid)
+        if key is None:
+            self.unknown_kids += 1
+            self._wake.set()
+        return key
+
+    def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("JWKS refresh failed")
+            woken = self._wake.wait(self.refresh_interval)
+            if self._stop.is_set():
+                return
+            if woken:
+                # Throttle early refreshes asked for by unknown kids
+                elapsed = time.monotonic() - self._last_refresh
+                if self._stop.wait(max(0.0, self.min_refresh_interval - elapsed)):
+                    return
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="jwks-refresh", daemon=True
+            )
+            self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "keys": len(self._keys),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "unknown_kids": self.unknown_kids,
+        }
@@ -1,26 +1,175 @@
-from fastapi import HTTPException, status, Depends, Header
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, HTTPException, Response, status, Depends, Header
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from config import (
+import asyncio
+import hashlib
+import secrets
+import time
+from sqlalchemy import event
+from sqlmodel.ext.asyncio.session import AsyncSession
+from core.config import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
     REFRESH_TOKEN_EXPIRE_DAYS,
-    SECRET_KEY,
     ALGORITHM,
+    JWT_CLAIMS_CACHE_MAX_ENTRIES,
+    JWT_PUBLIC_KEYS_DIR,
+    USER_CACHE_MAX_ENTRIES,
+    USER_CACHE_TTL_SECONDS,
 )
 
-from schemas import User, Token
-from models import User as DBUser
-from database import get_session
+from core.cache import LRUCache
+from core.custom_logging import get_service_logger
+from core.schemas import User, Token
+from core.models import User as DBUser
+from core.database import get_async_session
+from core.hashing import hashing_pool
+from core.jwks import JWKSCache, signing_key
+from core.revocation import revocations
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = get_service_logger(__name__)
 
+# Verified claims by token digest, each kept until its token's `exp`
+claims_cache = LRUCache(max_entries=JWT_CLAIMS_CACHE_MAX_ENTRIES)
 
-def verify_password(plain_password, hashed_password):
+# Public keys of the auth service; a retired key also drops the cached claims.
+# `auth_lifespan` runs its refresh thread for the lifetime of the app.
+jwks_cache = JWKSCache(on_removed=claims_cache.clear)
+
+
+@asynccontextmanager
+async def auth_lifespan(app: FastAPI):
+    """
+    Refresh the JWKS in the background for the lifetime of the app.
+
+    Without `JWKS_URL`, `JWT_PRIVATE_KEY_PATH` or `JWT_PUBLIC_KEYS_DIR` there is
+    no key to verify with, so every token is rejected; this is logged at startup.
+    """
+    if not (jwks_cache.url or signing_key.available or JWT_PUBLIC_KEYS_DIR):
+        logger.error(
+            "No token keys configured: set JWKS_URL, or JWT_PRIVATE_KEY_PATH on "
+            "the auth service. Every token will be rejected."
+        )
+    jwks_cache.start()
+    try:
+        yield
+    finally:
+        await asyncio.to_thread(jwks_cache.close)
+        await asyncio.to_thread(revocations.close)
+
+
+def decode_token(token: str) -> dict:
+    """
+    Verify a token and return its claims, caching them until the token expires.
+
+    The signature is checked locally with the public key named by the token's
+    `kid` header, taken from the cached JWKS.
+
+    The cache key is a digest of the whole token, signature included, so only a
+    byte-identical token can hit an entry. Tokens without `exp` and tokens that
+    fail verification are never cached.
+
+    Args:
+        token (str): The encoded JWT.
+
+    Returns:
+        dict: The verified claims.
+
+    Raises:
+        JWTError: If the token is invalid or expired.
+    """
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    found, claims = claims_cache.get(key)
+    if found:
+        return dict(claims)
+
+    kid = jwt.get_unverified_header(token).get("kid")
+    if not isinstance(kid, str):
+        raise JWTError("Token has no valid key id")
+    verification_key = jwks_cache.get(kid)
+    if verification_key is None:
+        raise JWTError("Token is signed with an unknown key")
+    claims = jwt.decode(token, verification_key, algorithms=[ALGORITHM])
+    expires_in = claims.get("exp", 0) - time.time()
+    if expires_in > 0:
+        claims_cache.set(key, claims, ttl=expires_in)
+    return dict(claims)
+
+
+# Authenticated users by id. Entries are dropped whenever this process writes
+# the user; the short TTL bounds staleness for writes made elsewhere.
+user_cache = LRUCache(max_entries=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL_SECONDS)
+
+
+async def load_user(session: AsyncSession, user_id: int) -> Optional[dict]:
+    """
+    Fetch a user's public fields, from the user cache when possible.
+
+    Args:
+        session (AsyncSession): The request's database session; only used on a miss.
+        user_id (int): The user's id.
+
+    Returns:
+        Optional[dict]: The user without its password hash, or None if not found.
+    """
+    found, user = user_cache.get(user_id)
+    if found:
+        return user
+
+    db_user = await session.get(DBUser, user_id)
+    if db_user is None:
+        return None
+    user = db_user.model_dump(exclude={"hashed_password"})
+    user_cache.set(user_id, user)
+    return user
+
+
+def invalidate_user(user_id: int):
+    """
+    Forget the cached copy of a user after it has changed.
     """
-    Verify a plain password against a hashed password.
+    user_cache.delete(user_id)
+
+
+@event.listens_for(DBUser, "after_insert")
+@event.listens_for(DBUser, "after_update")
+@event.listens_for(DBUser, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_user(target.user_id)
+
+
+async def revoke_token(token: str):
+    """
+    Revoke a token, e.g. on logout, until it expires.
+
+    Invalid or expired tokens, and tokens without a `jti`, are left alone; they
+    are rejected anyway or cannot be revoked.
+
+    Args:
+        token (str): The encoded JWT.
+    """
+    try:
+        claims = decode_token(token)
+    except JWTError:
+        return
+    if claims.get("jti") and claims.get("exp"):
+        await revocations.revoke(claims["jti"], claims["exp"])
+
+
+async def is_token_revoked(claims: dict) -> bool:
+    """
+    Whether verified claims belong to a revoked token.
+
+    Tokens issued before revocation support carry no `jti` and are never revoked.
+    """
+    jti = claims.get("jti")
+    return bool(jti) and await revocations.is_revoked(jti)
+
+
+async def verify_password(plain_password, hashed_password):
+    """
+    Verify a plain password against a hashed password on the hashing pool.
 
     Args:
         plain_password (str): The plain password.
@@ -28,51 +177,82 @@ def verify_password(plain_password, hashed_password):
 
     Returns:
         bool: True if the password matches, False otherwise.
+
+    Raises:
+        HTTPException: 503 if the hashing pool is saturated.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return await hashing_pool.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password):
+async def get_password_hash(password):
     """
-    Hash a password.
+    Hash a password on the hashing pool.
 
     Args:
         password (str): The plain password.
 
     Returns:
         str: The hashed password.
+
+    Raises:
+        HTTPException: 503 if the hashing pool is saturated.
     """
-    return pwd_context.hash(password)
+    return await hashing_pool.hash(password)
 
 
-def authenticate_user(user_id: int, password: str) -> Token:
+async def authenticate_user(
+    user_id: int, password: str, session: AsyncSession
+) -> Token:
     """
-    Authenticate a user by username and password.
+    Authenticate a user by id and password.
+
+    The bcrypt check runs on the bounded hashing pool and the tokens are signed on
+    a worker thread, so neither blocks the event loop. A stored hash made with
+    outdated parameters (e.g. a lower cost) is replaced after a successful check.
 
     Args:
-        fake_db (dict): The database of users.
-        username (str): The username of the user.
+        user_id (int): The id of the user.
         password (str): The plain password of the user.
+        session (AsyncSession): The database session.
 
     Returns:
         Token: The authenticated user token object if successful, raises HTTPException otherwise.
+
+    Raises:
+        HTTPException: 401 if the credentials are wrong, 503 if the hashing pool is
+            saturated.
     """
-    session = next(get_session())
-    user = session.get(DBUser, user_id)
+    user = await session.get(DBUser, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+        )
 
-    if not user or not verify_password(password, user.hashed_password):
+    verified, new_hash = await hashing_pool.verify_and_update(
+        password, user.hashed_password
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
+    if new_hash:
+        user.hashed_password = new_hash
+        session.add(user)
+        await session.commit()
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username, "req_count": 0}, expires_delta=access_token_expires
+    access_token = await asyncio.to_thread(
+        create_access_token,
+        data={"sub": str(user.user_id), "req_count": 0},
+        expires_delta=access_token_expires,
     )
     refresh_token_expires = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    refresh_token = create_refresh_token(
-        data={"sub": user.username, "req_count": 0}, expires_delta=refresh_token_expires
+    refresh_token = await asyncio.to_thread(
+        create_refresh_token,
+        data={"sub": str(user.user_id), "req_count": 0},
+        expires_delta=refresh_token_expires,
     )
     # Assuming Token is a Pydantic model
     return Token(
@@ -90,6 +270,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
     Returns:
         str: The encoded JWT access token.
+
+    Raises:
+        RuntimeError: If this service is not the auth service and cannot sign.
     """
     to_encode = data.copy()
     if expires_delta:
@@ -98,8 +281,11 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.now(timezone.utc) + timedelta(
             minutes=ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "jti": secrets.token_urlsafe(16)})
+    kid, private_key = signing_key.get()
+    encoded_jwt = jwt.encode(
+        to_encode, private_key, algorithm=ALGORITHM, headers={"kid": kid}
+    )
     return encoded_jwt
 
 
@@ -113,20 +299,27 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
 
     Returns:
         str: The encoded JWT refresh token.
+
+    Raises:
+        RuntimeError: If this service is not the auth service and cannot sign.
     """
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "jti": secrets.token_urlsafe(16)})
+    kid, private_key = signing_key.get()
+    encoded_jwt = jwt.encode(
+        to_encode, private_key, algorithm=ALGORITHM, headers={"kid": kid}
+    )
     return encoded_jwt
 
 
 async def get_current_user(
     x_access_token: str = Header(..., alias="X-Access-Token"),
     x_refresh_token: str = Header(..., alias="X-Refresh-Token"),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """
     Retrieve the current user based on the provided access and refresh tokens.
@@ -134,18 +327,20 @@ async def get_current_user(
     Args:
         access_token (str): The access token provided in the request header.
         refresh_token (str): The refresh token provided in the request header.
+        session (AsyncSession): The request's database session, used only when the
+            user is not cached.
 
     Returns:
         User: The authenticated user object with updated tokens if necessary.
 
     Raises:
-        HTTPException: If the access token or refresh token is missing, invalid, or expired.
+        HTTPException: If the access token or refresh token is missing, invalid,
+            expired or revoked.
     """
     new_access_token = None
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
-        headers={"X-Access-Token": None, "X-Refresh-Token": None},
     )
 
     # Check if both access and refresh tokens are provided
@@ -161,9 +356,15 @@ async def get_current_user(
 
     try:
         # Decode the access token
-        payload = jwt.decode(x_access_token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(x_access_token)
         username: str = payload.get("sub")
         req_count: str = payload.get("req_count")
+        if await is_token_revoked(payload):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Access token has been revoked",
+                headers={"X-Access-Token": x_access_token},
+            )
 
         if username is None:
             raise HTTPException(
@@ -172,10 +373,23 @@ async def get_current_user(
                 headers={"X-Access-Token": x_access_token},
             )
     except JWTError:
+        # Only the auth service can mint a replacement access token
+        if not signing_key.available:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Access token is invalid or expired",
+                headers={"X-Access-Token": x_access_token},
+            )
         # If access token is invalid, try to decode the refresh token
         try:
-            payload = jwt.decode(x_refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+            payload = decode_token(x_refresh_token)
             username: str = payload.get("sub")
+            if await is_token_revoked(payload):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Refresh token has been revoked",
+                    headers={"X-Refresh-Token": x_refresh_token},
+                )
             if username is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -184,8 +398,10 @@ async def get_current_user(
                 )
             # Create a new access token if the refresh token is valid
             access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-            new_access_token = create_access_token(
-                data={"sub": username}, expires_delta=access_token_expires
+            new_access_token = await asyncio.to_thread(
+                create_access_token,
+                data={"sub": username},
+                expires_delta=access_token_expires,
             )
 
         except JWTError:
@@ -193,21 +409,30 @@ async def get_current_user(
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Refresh token is expired",
-                headers={"X-Refresh-Token": None},
             )
 
-    # Retrieve user information from the database
-    session = next(get_session())
-    user = session.get(DBUser, int(username))
-
+    # Retrieve user information from the cache or the database
+    try:
+        user = await load_user(session, int(username))
+    except ValueError:
+        raise credentials_exception
     if user is None:
         raise credentials_exception
 
-    user = User(**user.model_dump())
+    user = User(
+        userId=user["user_id"],
+        userName=user["username"],
+        fullName=user["full_name"],
+        email=user["email"],
+        disabled=user["disabled"],
+    )
     # Update user object with new access token if it was generated
     if new_access_token:
-        user.access_token = new_access_token
-        user.refresh_token = x_refresh_token
+        user.token = Token(
+            access_token=new_access_token,
+            refresh_token=x_refresh_token,
+            token_type="JWT",
+        )
 
     return user
 
@@ -228,3 +453,38 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     if current_user.disabled:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+# Mounted by the auth service; see core.lifespan.include_auth_routes
+auth_router = APIRouter(prefix="/auth", tags=["Auth"])
+
+
+@auth_router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    x_access_token: str = Header(..., alias="X-Access-Token"),
+    x_refresh_token: str = Header(..., alias="X-Refresh-Token"),
+):
+    """
+    Revoke the caller's access and refresh tokens.
+
+    An expired access token is accepted, since the refresh token is what keeps
+    the session alive; every still valid token is revoked.
+
+    Raises:
+        HTTPException: 401 if neither token is valid, or if they belong to
+            different users.
+    """
+    valid = {}
+    for token in (x_access_token, x_refresh_token):
+        try:
+            valid[token] = decode_token(token).get("sub")
+        except JWTError:
+            continue
+    if not valid or len(set(valid.values())) > 1:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+    for token in valid:
+        await revoke_token(token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
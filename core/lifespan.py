@@ -0,0 +1,30 @@
+"""
+Startup and shutdown shared by every service.
+"""
+
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+
+from core.jwks import jwks_router, signing_key
+from core.jwt_auth import auth_lifespan, auth_router
+from core.rate_limiting import rate_limit_lifespan
+
+
+@asynccontextmanager
+async def service_lifespan(app: FastAPI):
+    """
+    Run the JWKS refresh and the async rate limit backend for the app's lifetime.
+    """
+    async with auth_lifespan(app), rate_limit_lifespan(app):
+        yield
+
+
+def include_auth_routes(app: FastAPI):
+    """
+    Publish the JWKS and accept logouts if this service is the auth service,
+    i.e. holds the signing key.
+    """
+    if signing_key.available:
+        app.include_router(jwks_router)
+        app.include_router(auth_router)
@@ -1,5 +1,5 @@
 from sqlmodel import SQLModel, Field, Relationship, create_engine, Session, select
-from typing import Optional, List
+from typing import ClassVar, Optional, List
 from datetime import date
 
 # from sqlalchemy.orm import relationship
@@ -69,6 +69,9 @@ class Customer(SQLModel, table=True):
 
 class ProductLine(SQLModel, table=True):
     __tablename__ = "productlines"
+    # Large columns left out of list/detail queries; the image is served
+    # separately by GET /productlines/{product_line}/image
+    __deferred_columns__: ClassVar[tuple] = ("html_description", "image")
 
     product_line: str = Field(primary_key=True, max_length=50)
     text_description: Optional[str] = Field(default=None, max_length=4000)
@@ -136,6 +139,17 @@ class Payment(SQLModel, table=True):
     customer: Optional["Customer"] = Relationship(back_populates="payments")
 
 
+class User(SQLModel, table=True):
+    __tablename__ = "users"
+
+    user_id: int = Field(primary_key=True)
+    username: str = Field(max_length=50, unique=True)
+    full_name: str = Field(max_length=100)
+    email: Optional[str] = Field(default=None, max_length=100)
+    hashed_password: str = Field(max_length=255)
+    disabled: bool = Field(default=False)
+
+
 # Update forward references
 Office.model_rebuild()
 Employee.model_rebuild()
@@ -145,3 +159,4 @@ Product.model_rebuild()
 Order.model_rebuild()
 OrderDetail.model_rebuild()
 Payment.model_rebuild()
+User.model_rebuild()
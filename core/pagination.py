@@ -0,0 +1,151 @@
+"""
+Keyset (cursor) pagination helpers for the list endpoints.
+
+Pages are ordered by the model's primary key and the `after` cursor is an
+opaque, URL-safe encoding of the last primary key on the previous page. Each
+page is fetched with a `WHERE pk > :cursor ORDER BY pk LIMIT :n` query, so the
+cost of a page does not depend on how deep the client has paged.
+
+The response body stays a plain list; the cursor for the next page is
+returned in the `X-Next-Cursor` header (absent on the last page).
+"""
+
+import base64
+import json
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, inspect, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode primary key values into an opaque cursor string.
+
+    Args:
+        values (Sequence[Any]): The primary key values of the last row on a page.
+
+    Returns:
+        str: A URL-safe cursor.
+    """
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The opaque cursor sent by the client.
+        size (int): The number of primary key columns expected.
+
+    Returns:
+        list: The primary key values.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        values = None
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(
+            isinstance(value, (str, int, float)) and not isinstance(value, bool)
+            for value in values
+        )
+    ):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return values
+
+
+class KeysetPage:
+    """
+    FastAPI dependency holding the `limit` and `after` query parameters.
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(
+            DEFAULT_PAGE_SIZE,
+            ge=1,
+            le=MAX_PAGE_SIZE,
+            description="Maximum number of items to return",
+        ),
+        after: Optional[str] = Query(
+            None, description="Cursor returned in the X-Next-Cursor header"
+        ),
+    ):
+        self.limit = limit
+        self.after = after
+
+
+def primary_key_columns(model) -> list:
+    """
+    Return the primary key columns of a table model, in declaration order.
+    """
+    return list(inspect(model).primary_key)
+
+
+def keyset_filter(columns: list, values: List[Any]):
+    """
+    Build `(c1, c2, ...) > (v1, v2, ...)` expanded into portable boolean logic.
+
+    The expanded form (`c1 > v1 OR (c1 = v1 AND c2 > v2) ...`) is used instead
+    of a row-value comparison so MySQL can plan it as an index range scan.
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, column > values[i]))
+    return or_(*clauses)
+
+
+def paginate(statement, model, page: KeysetPage):
+    """
+    Apply keyset ordering, the cursor filter and the page limit to a statement.
+
+    One extra row is requested so `fetch_page` can tell whether another page
+    exists without a separate COUNT query.
+    """
+    columns = primary_key_columns(model)
+    if page.after:
+        values = decode_cursor(page.after, len(columns))
+        statement = statement.where(keyset_filter(columns, values))
+    return statement.order_by(*columns).limit(page.limit + 1)
+
+
+async def fetch_page(
+    session: AsyncSession, statement, model, page: KeysetPage, response: Response
+) -> list:
+    """
+    Execute a paginated statement and set the next-page cursor header.
+
+    Args:
+        session (AsyncSession): The database session.
+        statement: A `select` over `model` (or over a subset of its columns that
+            includes the primary key).
+        model: The table model being listed.
+        page (KeysetPage): The pagination parameters.
+        response (Response): The response used to return the next cursor.
+
+    Returns:
+        list: At most `page.limit` rows.
+    """
+    rows = (await session.exec(paginate(statement, model, page))).all()
+    if len(rows) > page.limit:
+        rows = rows[: page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            [getattr(last, column.key) for column in primary_key_columns(model)]
+        )
+    return rows
@@ -0,0 +1,323 @@
+"""
+Two-tier token bucket: a local allowance in each worker, leased from a shared
+bucket.
+
+Every worker takes whole tokens out of the global token bucket (kept by the
+`RateLimitBackend`, normally Redis) in chunks, and spends them locally. Most
+decisions therefore need no network at all. A background thread settles all
+leases in one batched call every `sync_interval` seconds:
+
+- It tops up busy leases that are running low before they run out.
+- It returns the unused tokens of leases idle for longer than `lease_ttl`, so
+  other workers can spend them.
+
+Leased tokens have already been taken out of the global bucket, so the
+workers together never admit more than the global limit. The error is on the
+other side: tokens sitting unused in one worker's lease are unavailable to
+the others for at most `lease_ttl` seconds. Smaller chunks tighten that at
+the cost of more round trips.
+
+The leases share their Redis keys with `token_bucket_dependency`, so both can
+enforce the same limit. `AsyncLeasedTokenBucket` does the same over an async
+backend, with the sync running as a task on the event loop.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from core.config import (
+    RATE_LIMIT_LEASE_CHUNK,
+    RATE_LIMIT_LEASE_SYNC_SECONDS,
+    RATE_LIMIT_LEASE_TTL_SECONDS,
+)
+from core.custom_logging import get_service_logger
+from core.rate_limiting import AsyncRedisBackend, RateLimitBackend, resolve_decision
+
+logger = get_service_logger(__name__)
+
+
+class _Lease:
+    __slots__ = ("tokens", "last_used", "denied_until")
+
+    def __init__(self, now: float):
+        self.tokens = 0
+        self.last_used = now
+        self.denied_until = 0.0
+
+
+class LeasedTokenBucket:
+    """
+    Token bucket limiter that spends tokens leased from a shared backend.
+
+    With `background_sync=False` no thread is started and the caller drives
+    `sync()` itself, e.g. on a simulated clock.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        max_tokens: float = 10,
+        refill_rate: float = 1,
+        chunk_size: int = RATE_LIMIT_LEASE_CHUNK,
+        lease_ttl: float = RATE_LIMIT_LEASE_TTL_SECONDS,
+        sync_interval: float = RATE_LIMIT_LEASE_SYNC_SECONDS,
+        background_sync: bool = True,
+    ):
+        if max_tokens <= 0 or refill_rate <= 0:
+            raise ValueError("max_tokens and refill_rate must be positive")
+        self.backend = backend
+        self.max_tokens = max_tokens
+        self.refill_rate = refill_rate
+        self.chunk_size = max(1, min(chunk_size, int(max_tokens)))
+        self.lease_ttl = lease_ttl
+        self.sync_interval = sync_interval
+        self.background_sync = background_sync
+        self.local_hits = 0
+        self.remote_leases = 0
+        self.denials = 0
+        self.returned_tokens = 0
+        self._leases: Dict[str, _Lease] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _take(self, lease: _Lease, now: float) -> bool:
+        lease.last_used = now
+        if lease.tokens >= 1:
+            lease.tokens -= 1
+            return True
+        return False
+
+    def _acquire_local(self, key: str, now: float) -> Tuple[Optional[bool], _Lease]:
+        # (decision, lease); the decision is None when a lease must be taken
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is None:
+                lease = self._leases[key] = _Lease(now)
+            if self._take(lease, now):
+                self.local_hits += 1
+                return True, lease
+            # The global bucket was empty a moment ago; don't ask again until
+            # it has had time to refill a token.
+            if now < lease.denied_until:
+                self.denials += 1
+                return False, lease
+        return None, lease
+
+    def _lease_request(self, key: str) -> List[Tuple[str, float, float, int, float]]:
+        return [(key, self.max_tokens, self.refill_rate, self.chunk_size, 0)]
+
+    def _granted(self, key: str, lease: _Lease, granted: int, now: float) -> bool:
+        with self._lock:
+            self.remote_leases += 1
+            lease = self._leases.setdefault(key, lease)
+            lease.tokens += granted
+            if self._take(lease, now):
+                return True
+            lease.denied_until = now + 1 / self.refill_rate
+            self.denials += 1
+            return False
+
+    def acquire(self, key: str, now: Optional[float] = None) -> bool:
+        """
+        Spend one token for `key`, leasing a new chunk if the local one is empty.
+        """
+        if self._thread is None and self.background_sync:
+            self.start()
+        now = time.time() if now is None else now
+        allowed, lease = self._acquire_local(key, now)
+        if allowed is not None:
+            return allowed
+        (granted,) = self.backend.lease_tokens(self._lease_request(key), now)
+        return self._granted(key, lease, granted, now)
+
+    def _settlements(
+        self, now: float, release_all: bool
+    ) -> List[Tuple[str, float, float, int, float]]:
+        settlements: List[Tuple[str, float, float, int, float]] = []
+        with self._lock:
+            for key, lease in list(self._leases.items()):
+                if release_all or now - lease.last_used > self.lease_ttl:
+                    del self._leases[key]
+                    if lease.tokens:
+                        settlements.append(
+                            (key, self.max_tokens, self.refill_rate, 0, lease.tokens)
+                        )
+                        self.returned_tokens += lease.tokens
+                elif (
+                    lease.tokens < self.chunk_size / 2
+                    and now >= lease.denied_until
+                    and now - lease.last_used <= self.sync_interval
+                ):
+                    settlements.append(
+                        (
+                            key,
+                            self.max_tokens,
+                            self.refill_rate,
+                            self.chunk_size - lease.tokens,
+                            0,
+                        )
+                    )
+        return settlements
+
+    def _settled(self, settlements, granted, now: float) -> None:
+        with self._lock:
+            for (key, _, _, requested, _), grant in zip(settlements, granted):
+                if not requested:
+                    continue
+                self.remote_leases += 1
+                lease = self._leases.get(key)
+                if lease is None:
+                    # The key went idle meanwhile; hand the grant back next time
+                    lease = self._leases[key] = _Lease(now - self.lease_ttl)
+                lease.tokens += grant
+
+    def sync(self, now: Optional[float] = None, release_all: bool = False) -> None:
+        """
+        Return idle leases and top up busy ones in a single batched call.
+        """
+        now = time.time() if now is None else now
+        settlements = self._settlements(now, release_all)
+        if settlements:
+            self._settled(settlements, self.backend.lease_tokens(settlements, now), now)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Rate limit lease sync failed")
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="rate-limit-leases", daemon=True
+            )
+            self._thread.start()
+
+    def close(self) -> None:
+        """
+        Stop the background sync and give every unused token back.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.sync(release_all=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "leases": len(self._leases),
+            "local_hits": self.local_hits,
+            "remote_leases": self.remote_leases,
+            "denials": self.denials,
+            "returned_tokens": self.returned_tokens,
+        }
+
+
+class AsyncLeasedTokenBucket(LeasedTokenBucket):
+    """
+    `LeasedTokenBucket` for async backends such as `AsyncRedisBackend`.
+
+    Leases are taken and settled by awaiting the backend, and the periodic
+    sync runs as a task on the event loop instead of a thread. `acquire`,
+    `sync` and `close` must be awaited.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._task: Optional[asyncio.Task] = None
+
+    async def acquire(self, key: str, now: Optional[float] = None) -> bool:
+        if self._task is None and self.background_sync:
+            self.start()
+        now = time.time() if now is None else now
+        allowed, lease = self._acquire_local(key, now)
+        if allowed is not None:
+            return allowed
+        (granted,) = await resolve_decision(
+            self.backend.lease_tokens(self._lease_request(key), now)
+        )
+        return self._granted(key, lease, granted, now)
+
+    async def sync(self, now: Optional[float] = None, release_all: bool = False):
+        now = time.time() if now is None else now
+        settlements = self._settlements(now, release_all)
+        if settlements:
+            granted = await resolve_decision(
+                self.backend.lease_tokens(settlements, now)
+            )
+            self._settled(settlements, granted, now)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Rate limit lease sync failed")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """
+        Stop the background sync and give every unused token back.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.sync(release_all=True)
+
+
+def leased_token_bucket_dependency(limiter: LeasedTokenBucket):
+    """
+    Build a rate limiting dependency that spends tokens from `limiter`.
+
+    Args:
+        limiter (LeasedTokenBucket): The limiter holding this worker's leases.
+
+    Returns:
+        Callable: A dependency taking a `user_id` that raises an `HTTPException`
+            with status 429 when no token is available.
+
+    Raises:
+        TypeError: If `limiter` needs awaiting; use
+            `async_leased_token_bucket_dependency` for async backends.
+    """
+    if isinstance(limiter, AsyncLeasedTokenBucket) or isinstance(
+        limiter.backend, AsyncRedisBackend
+    ):
+        raise TypeError("Use async_leased_token_bucket_dependency for async backends")
+
+    def dependency(user_id: str):
+        if not limiter.acquire(f"token_bucket:{user_id}"):
+            raise HTTPException(status_code=429, detail="Too many requests")
+        return {"status": "Allowed"}
+
+    return dependency
+
+
+def async_leased_token_bucket_dependency(limiter: AsyncLeasedTokenBucket):
+    """
+    Async version of `leased_token_bucket_dependency`.
+    """
+
+    async def dependency(user_id: str):
+        if not await limiter.acquire(f"token_bucket:{user_id}"):
+            raise HTTPException(status_code=429, detail="Too many requests")
+        return {"status": "Allowed"}
+
+    return dependency
@@ -0,0 +1,215 @@
+"""
+ASGI middleware applying rate limits before a request reaches the app.
+
+Rejections are decided from the method, the path and the caller's identity
+alone. A rejected request never gets to routing, body parsing, dependency
+resolution or a database session.
+
+The identity is the `sub` claim of a verified access token. The token is
+taken from `X-Access-Token` or `Authorization: Bearer`. Without a valid token
+the client IP is used instead. An invalid token is not rejected here;
+authentication stays the route's job.
+
+Policies form an ordered table; the first one matching the request applies.
+Paths use the FastAPI template syntax (`{name}` matches one path segment) plus
+`*` for any suffix. The whole table is compiled into one regular expression
+per HTTP method. A policy with `limit=None` exempts its routes.
+
+The backend is the one `rate_limit_lifespan` puts on `app.state`. If the
+backend fails, the request is let through and the error is logged.
+"""
+
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional, Pattern, Sequence
+
+from jose import JWTError
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from core.custom_logging import get_service_logger
+from core.jwt_auth import decode_token
+from core.rate_limiting import gcra_headers, resolve_decision
+
+logger = get_service_logger(__name__)
+
+HTTP_METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+
+
+class RateLimitPolicy(NamedTuple):
+    """
+    Allow `limit` requests per `period` seconds, per identity, on matching routes.
+    """
+
+    name: str
+    methods: str  # comma separated, or "*"
+    path: str
+    limit: Optional[int]
+    period: float = 60
+    algorithm: str = "gcra"
+
+
+DEFAULT_RATE_LIMIT_POLICIES = [
+    RateLimitPolicy("docs", "*", "/", None),
+    RateLimitPolicy("docs", "*", "/docs*", None),
+    RateLimitPolicy("docs", "*", "/redoc*", None),
+    RateLimitPolicy("docs", "*", "/openapi.json", None),
+    RateLimitPolicy("payments-write", "POST,PUT,DELETE", "/payments/*", 10),
+    RateLimitPolicy("bulk-write", "POST", "/{resource}/bulk", 5),
+    RateLimitPolicy("default", "*", "*", 300),
+]
+
+# Maps each policy onto the backend method of its algorithm
+_ALGORITHMS = {
+    "gcra": lambda backend, policy, key, now: backend.gcra(
+        key, policy.period / policy.limit, policy.limit, now
+    ),
+    "token_bucket": lambda backend, policy, key, now: backend.token_bucket(
+        key, policy.limit, policy.limit / policy.period, now
+    ),
+    "leaky_bucket": lambda backend, policy, key, now: backend.leaky_bucket(
+        key, policy.limit, policy.limit / policy.period, now
+    ),
+    "fixed_window": lambda backend, policy, key, now: backend.fixed_window(
+        key, policy.limit, int(policy.period), now
+    ),
+    "sliding_window_log": lambda backend, policy, key, now: (
+        backend.sliding_window_log(key, policy.limit, int(policy.period), now)
+    ),
+    "sliding_window_counter": lambda backend, policy, key, now: (
+        backend.sliding_window_counter(
+            key, policy.limit, int(policy.period), max(1, int(policy.period) // 6), now
+        )
+    ),
+}
+
+
+def policy_decision(backend, policy: RateLimitPolicy, key: str, now: float):
+    """
+    Run `policy`'s algorithm on `backend`; async backends return an awaitable.
+    """
+    return _ALGORITHMS[policy.algorithm](backend, policy, key, now)
+
+
+def _path_regex(path: str) -> str:
+    parts = re.split(r"(\{[^}]+\}|\*)", path)
+    return "".join(
+        "[^/]+" if part.startswith("{") else ".*" if part == "*" else re.escape(part)
+        for part in parts
+    )
+
+
+class RoutePolicyTable:
+    """
+    First-match lookup of the policy for a request, one regex per method.
+    """
+
+    def __init__(self, policies: Sequence[RateLimitPolicy]):
+        for policy in policies:
+            if policy.limit is None:
+                continue
+            if policy.algorithm not in _ALGORITHMS:
+                raise ValueError(f"Unknown rate limit algorithm: {policy.algorithm}")
+            # The algorithms divide by both, e.g. for the GCRA emission interval
+            if policy.limit <= 0 or policy.period <= 0:
+                raise ValueError(f"Rate limit policy {policy.name} must be positive")
+        self.policies = list(policies)
+        self._patterns: Dict[str, Pattern] = {
+            method: self._compile(method) for method in HTTP_METHODS
+        }
+
+    def _compile(self, method: str) -> Pattern:
+        alternatives = [
+            f"(?P<p{index}>{_path_regex(policy.path)})"
+            for index, policy in enumerate(self.policies)
+            if policy.methods == "*" or method in policy.methods.split(",")
+        ]
+        return re.compile("|".join(alternatives) or "(?!)")
+
+    def match(self, method: str, path: str) -> Optional[RateLimitPolicy]:
+        pattern = self._patterns.get(method)
+        match = pattern.fullmatch(path) if pattern else None
+        if match is None:
+            return None
+        return self.policies[int(match.lastgroup[1:])]
+
+
+def _token_subject(token: str) -> Optional[str]:
+    try:
+        payload = decode_token(token)
+    except JWTError:
+        return None
+    subject = payload.get("sub")
+    return str(subject) if subject is not None else None
+
+
+def request_identity(scope) -> str:
+    """
+    Identify the caller by verified token subject, falling back to client IP.
+    """
+    headers = Headers(scope=scope)
+    token = headers.get("x-access-token")
+    if not token:
+        scheme, _, credentials = headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer":
+            token = credentials
+    if token:
+        subject = _token_subject(token)
+        if subject is not None:
+            return f"user:{subject}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """
+    Reject over-limit requests with 429 before they are routed.
+    """
+
+    def __init__(self, app, policies: Optional[List[RateLimitPolicy]] = None):
+        self.app = app
+        self.table = RoutePolicyTable(
+            DEFAULT_RATE_LIMIT_POLICIES if policies is None else policies
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        policy = self.table.match(scope["method"], scope["path"])
+        backend = getattr(scope["app"].state, "rate_limit_backend", None)
+        if policy is None or policy.limit is None or backend is None:
+            return await self.app(scope, receive, send)
+
+        key = f"rate_limit:{policy.name}:{request_identity(scope)}"
+        try:
+            decision = await resolve_decision(
+                policy_decision(backend, policy, key, time.time())
+            )
+        except Exception:
+            logger.exception("Rate limit backend failed; allowing request")
+            return await self.app(scope, receive, send)
+
+        headers = {}
+        if policy.algorithm == "gcra":
+            headers = gcra_headers(policy.limit, decision)
+        if not decision[0]:
+            response = JSONResponse(
+                {"detail": "Too many requests"}, status_code=429, headers=headers
+            )
+            return await response(scope, receive, send)
+        if not headers:
+            return await self.app(scope, receive, send)
+
+        raw_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers.items()
+        ]
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + raw_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
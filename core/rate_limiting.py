@@ -9,33 +9,527 @@ policies for different types of rate limiting algorithms, including:
 - Fixed Window Counter
 - Sliding Window Log
 - Sliding Window Counter
+- Generic Cell Rate Algorithm (GCRA)
 
 Each dependency takes a `user_id` parameter and optional configuration
 parameters to customize the rate limiting behavior. The dependencies will
 raise an `HTTPException` with a 429 Too Many Requests status code if the
 rate limit is exceeded.
+
+The token bucket and leaky bucket keep their state in a Redis hash and are
+evaluated by Lua scripts, so the refill (or leak), the decision and the write
+back happen atomically in a single round trip. The scripts are registered once
+and invoked with EVALSHA; redis-py loads them again if the server has
+forgotten them. Token and request counts are stored as fractions so slow
+refill rates are not rounded away between calls.
+
+The sliding window counter keeps one hash per user whose fields are the
+sub-window indexes, and is evaluated the same way, so a check costs one round
+trip regardless of how many sub-windows make up the window.
+
+GCRA stores a single theoretical arrival time per user, so its memory is O(1)
+per client regardless of traffic, and it reports `RateLimit-*` and
+`Retry-After` headers.
+
+The algorithms run against a `RateLimitBackend`. `RedisBackend` shares the
+limits across workers and services; `InMemoryBackend` (see `core.in_memory`)
+keeps them inside the process. `RATE_LIMIT_BACKEND` picks the default.
+
+Every algorithm is a Redis script, so `AsyncRedisBackend` runs exactly the same
+code over `redis.asyncio`. The `async_*_dependency` variants use it through a
+connection pool that `rate_limit_lifespan` opens and closes with the app; they
+don't occupy a threadpool slot while waiting on Redis.
 """
 
-from fastapi import Depends, FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
 from datetime import datetime, timedelta
+from typing import List, Protocol, Tuple
+import inspect
+import math
+import secrets
 import time
 import redis
+import redis.asyncio
 
-app = FastAPI()
-redis_client = redis.StrictRedis(
-    host="localhost", port=6379, db=0, decode_responses=True
+from core.config import (
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_REDIS_URL,
+    RATE_LIMIT_REDIS_POOL_SIZE,
+    RATE_LIMIT_REDIS_TIMEOUT,
 )
+from core.in_memory import InMemoryBackend
+
+app = FastAPI()
+redis_client = redis.StrictRedis.from_url(RATE_LIMIT_REDIS_URL, decode_responses=True)
 
 
 def get_redis_client():
     return redis_client
 
 
+# KEYS[1] = bucket key
+# ARGV = max_tokens, refill_rate (tokens/s), now (s), cost
+# Returns {allowed (0/1), remaining tokens as a string}
+TOKEN_BUCKET_SCRIPT = """
+local max_tokens = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local state = redis.call("HMGET", KEYS[1], "tokens", "last_refill_time")
+local tokens = tonumber(state[1])
+local last_refill_time = tonumber(state[2])
+if tokens == nil or last_refill_time == nil then
+    tokens = max_tokens
+    last_refill_time = now
+end
+
+local elapsed = math.max(0, now - last_refill_time)
+tokens = math.min(max_tokens, tokens + elapsed * refill_rate)
+
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+
+redis.call("HSET", KEYS[1], "tokens", string.format("%.17g", tokens),
+           "last_refill_time", ARGV[3])
+-- A bucket that has been idle long enough to refill completely is
+-- indistinguishable from a new one, so let Redis drop it.
+redis.call("EXPIRE", KEYS[1], math.ceil(max_tokens / refill_rate) + 1)
+return {allowed, string.format("%.17g", tokens)}
+"""
+
+# KEYS[1] = token bucket key (same layout as TOKEN_BUCKET_SCRIPT)
+# ARGV = max_tokens, refill_rate (tokens/s), now (s), requested, returned
+# Gives back `returned` unused tokens and takes up to `requested` whole tokens.
+# Returns {granted, remaining tokens as a string}
+TOKEN_LEASE_SCRIPT = """
+local max_tokens = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local requested = tonumber(ARGV[4])
+local returned = tonumber(ARGV[5])
+
+local state = redis.call("HMGET", KEYS[1], "tokens", "last_refill_time")
+local tokens = tonumber(state[1])
+local last_refill_time = tonumber(state[2])
+if tokens == nil or last_refill_time == nil then
+    tokens = max_tokens
+    last_refill_time = now
+end
+
+local elapsed = math.max(0, now - last_refill_time)
+tokens = math.min(max_tokens, tokens + elapsed * refill_rate + returned)
+local granted = math.max(0, math.min(requested, math.floor(tokens)))
+tokens = tokens - granted
+
+redis.call("HSET", KEYS[1], "tokens", string.format("%.17g", tokens),
+           "last_refill_time", ARGV[3])
+redis.call("EXPIRE", KEYS[1], math.ceil(max_tokens / refill_rate) + 1)
+return {granted, string.format("%.17g", tokens)}
+"""
+
+# KEYS[1] = bucket key
+# ARGV = capacity, leak_rate (requests/s), now (s)
+# Returns {allowed (0/1), bucket level as a string}
+LEAKY_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local leak_rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+local state = redis.call("HMGET", KEYS[1], "requests", "last_check")
+local requests = tonumber(state[1]) or 0
+local last_check = tonumber(state[2]) or now
+
+local elapsed = math.max(0, now - last_check)
+requests = math.max(0, requests - elapsed * leak_rate)
+
+local allowed = 0
+if requests + 1 <= capacity then
+    requests = requests + 1
+    allowed = 1
+end
+
+redis.call("HSET", KEYS[1], "requests", string.format("%.17g", requests),
+           "last_check", ARGV[3])
+-- Once the bucket has fully drained the state can be forgotten.
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / leak_rate) + 1)
+return {allowed, string.format("%.17g", requests)}
+"""
+
+# KEYS[1] = counter key for the current window
+# ARGV = max_requests, window_seconds
+# Returns {allowed (0/1), requests counted in the window}
+FIXED_WINDOW_SCRIPT = """
+local requests = tonumber(redis.call("GET", KEYS[1]) or "0")
+if requests >= tonumber(ARGV[1]) then
+    return {0, requests}
+end
+
+requests = redis.call("INCR", KEYS[1])
+if requests == 1 then
+    redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+return {1, requests}
+"""
+
+# KEYS[1] = sorted set of request timestamps
+# ARGV = max_requests, window_seconds, now (s), unique member for this request
+# Returns {allowed (0/1), requests logged in the window}
+SLIDING_WINDOW_LOG_SCRIPT = """
+local max_requests = tonumber(ARGV[1])
+local window_seconds = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", now - window_seconds)
+
+local requests = redis.call("ZCARD", KEYS[1])
+if requests >= max_requests then
+    -- Only ever keep the newest max_requests entries, even if the limit
+    -- was lowered since they were logged.
+    if requests > max_requests then
+        redis.call("ZREMRANGEBYRANK", KEYS[1], 0, requests - max_requests - 1)
+    end
+    return {0, max_requests}
+end
+
+redis.call("ZADD", KEYS[1], now, ARGV[4])
+-- Every entry is stale once a full window has passed since the newest one.
+redis.call("PEXPIRE", KEYS[1], math.ceil(window_seconds * 1000))
+return {1, requests + 1}
+"""
+
+# KEYS[1] = counter hash, one field per sub-window index
+# ARGV = max_requests, window_seconds, current sub-window, sub-windows per window
+# Returns {allowed (0/1), requests counted in the window}
+SLIDING_WINDOW_COUNTER_SCRIPT = """
+local max_requests = tonumber(ARGV[1])
+local window_seconds = tonumber(ARGV[2])
+local current = tonumber(ARGV[3])
+local sub_windows = tonumber(ARGV[4])
+
+local counts = redis.call("HGETALL", KEYS[1])
+local total = 0
+local stale = {}
+for i = 1, #counts, 2 do
+    if tonumber(counts[i]) > current - sub_windows then
+        total = total + tonumber(counts[i + 1])
+    else
+        stale[#stale + 1] = counts[i]
+    end
+end
+if #stale > 0 then
+    redis.call("HDEL", KEYS[1], unpack(stale))
+end
+
+local allowed = 0
+if total < max_requests then
+    redis.call("HINCRBY", KEYS[1], ARGV[3], 1)
+    total = total + 1
+    allowed = 1
+end
+redis.call("EXPIRE", KEYS[1], window_seconds)
+return {allowed, total}
+"""
+
+# KEYS[1] = theoretical arrival time (TAT) key
+# ARGV = emission interval (s), burst, now (s)
+# Returns {allowed (0/1), remaining, retry_after (s), reset_after (s)}
+GCRA_SCRIPT = """
+local emission_interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+local tat = tonumber(redis.call("GET", KEYS[1])) or now
+tat = math.max(tat, now)
+local new_tat = tat + emission_interval
+local allow_at = new_tat - burst * emission_interval
+local diff = now - allow_at
+
+if diff < 0 then
+    return {0, 0, string.format("%.17g", -diff), string.format("%.17g", tat - now)}
+end
+
+local reset_after = new_tat - now
+redis.call("SET", KEYS[1], string.format("%.17g", new_tat),
+           "PX", math.ceil(reset_after * 1000))
+local remaining = math.floor(diff / emission_interval)
+return {1, remaining, "0", string.format("%.17g", reset_after)}
+"""
+
+
+class RateLimitBackend(Protocol):
+    """
+    Storage and atomic decision for each rate limiting algorithm.
+
+    Every method records the request if it is allowed and returns whether it
+    was, followed by the algorithm's current level (tokens left, requests in
+    the window, ...). `now` is passed in, in seconds since the epoch.
+    """
+
+    def token_bucket(
+        self,
+        key: str,
+        max_tokens: float,
+        refill_rate: float,
+        now: float,
+        cost: float = 1,
+    ) -> Tuple[bool, float]: ...
+
+    def lease_tokens(
+        self,
+        leases: List[Tuple[str, float, float, int, float]],
+        now: float,
+    ) -> List[int]:
+        """
+        Settle a batch of token bucket leases.
+
+        Each lease is (key, max_tokens, refill_rate, requested, returned): the
+        unused `returned` tokens go back into the bucket and up to `requested`
+        whole tokens are taken out. Returns the number granted for each lease.
+        """
+        ...
+
+    def leaky_bucket(
+        self, key: str, capacity: float, leak_rate: float, now: float
+    ) -> Tuple[bool, float]: ...
+
+    def fixed_window(
+        self, key: str, max_requests: int, window_seconds: int, now: float
+    ) -> Tuple[bool, int]: ...
+
+    def sliding_window_log(
+        self, key: str, max_requests: int, window_seconds: int, now: float
+    ) -> Tuple[bool, int]: ...
+
+    def sliding_window_counter(
+        self,
+        key: str,
+        max_requests: int,
+        window_seconds: int,
+        sub_window_seconds: int,
+        now: float,
+    ) -> Tuple[bool, int]: ...
+
+    def gcra(
+        self, key: str, emission_interval: float, burst: int, now: float
+    ) -> Tuple[bool, int, float, float]:
+        """Returns (allowed, remaining, retry_after, reset_after)."""
+        ...
+
+
+def _decision(result) -> Tuple[bool, float]:
+    return bool(int(result[0])), float(result[1])
+
+
+def _count(result) -> Tuple[bool, int]:
+    return bool(int(result[0])), int(result[1])
+
+
+def _gcra_decision(result) -> Tuple[bool, int, float, float]:
+    allowed, remaining, retry_after, reset_after = result
+    return bool(allowed), int(remaining), float(retry_after), float(reset_after)
+
+
+class RedisBackend:
+    """
+    Rate limit state kept in Redis and shared by every worker.
+
+    Every algorithm is a registered script; `_call` is the only place that talks
+    to Redis, so `AsyncRedisBackend` reuses all of it by overriding `_call`.
+    """
+
+    SCRIPTS = {
+        "token_bucket": TOKEN_BUCKET_SCRIPT,
+        "token_lease": TOKEN_LEASE_SCRIPT,
+        "leaky_bucket": LEAKY_BUCKET_SCRIPT,
+        "fixed_window": FIXED_WINDOW_SCRIPT,
+        "sliding_window_log": SLIDING_WINDOW_LOG_SCRIPT,
+        "sliding_window_counter": SLIDING_WINDOW_COUNTER_SCRIPT,
+        "gcra": GCRA_SCRIPT,
+    }
+
+    def __init__(self, client: redis.StrictRedis):
+        self.client = client
+        self._scripts = {
+            name: client.register_script(source)
+            for name, source in self.SCRIPTS.items()
+        }
+
+    def _call(self, name, key, args, parse):
+        return parse(self._scripts[name](keys=[key], args=args))
+
+    def _lease_calls(self, leases, now):
+        for key, max_tokens, refill_rate, requested, returned in leases:
+            args = [max_tokens, refill_rate, repr(now), requested, repr(returned)]
+            yield [key], args
+
+    def token_bucket(self, key, max_tokens, refill_rate, now, cost=1):
+        # Refill, decrement and store back in one atomic call
+        return self._call(
+            "token_bucket", key, [max_tokens, refill_rate, repr(now), cost], _decision
+        )
+
+    def lease_tokens(self, leases, now):
+        # Every lease in the batch is settled in a single round trip
+        pipe = self.client.pipeline(transaction=False)
+        for keys, args in self._lease_calls(leases, now):
+            self._scripts["token_lease"](keys=keys, args=args, client=pipe)
+        return [int(granted) for granted, _ in pipe.execute()]
+
+    def leaky_bucket(self, key, capacity, leak_rate, now):
+        # Leak, add the request and save the updated state in one atomic call
+        return self._call(
+            "leaky_bucket", key, [capacity, leak_rate, repr(now)], _decision
+        )
+
+    def fixed_window(self, key, max_requests, window_seconds, now):
+        key = f"{key}:{int(now // window_seconds)}"
+        return self._call("fixed_window", key, [max_requests, window_seconds], _count)
+
+    def sliding_window_log(self, key, max_requests, window_seconds, now):
+        return self._call(
+            "sliding_window_log",
+            key,
+            # Requests logged at the same instant must not share a member
+            [max_requests, window_seconds, repr(now), secrets.token_hex(8)],
+            _count,
+        )
+
+    def sliding_window_counter(
+        self, key, max_requests, window_seconds, sub_window_seconds, now
+    ):
+        current_sub_window = int(now) // sub_window_seconds
+        sub_windows = -(-window_seconds // sub_window_seconds)
+
+        # Aggregate the sub-windows, drop stale ones and increment the current
+        # one in a single atomic call
+        return self._call(
+            "sliding_window_counter",
+            key,
+            [max_requests, window_seconds, current_sub_window, sub_windows],
+            _count,
+        )
+
+    def gcra(self, key, emission_interval, burst, now):
+        return self._call(
+            "gcra", key, [repr(emission_interval), burst, repr(now)], _gcra_decision
+        )
+
+
+class AsyncRedisBackend(RedisBackend):
+    """
+    `RedisBackend` on a `redis.asyncio` client; every method must be awaited.
+    """
+
+    async def _call(self, name, key, args, parse):
+        return parse(await self._scripts[name](keys=[key], args=args))
+
+    async def lease_tokens(self, leases, now):
+        pipe = self.client.pipeline(transaction=False)
+        for keys, args in self._lease_calls(leases, now):
+            await self._scripts["token_lease"](keys=keys, args=args, client=pipe)
+        return [int(granted) for granted, _ in await pipe.execute()]
+
+
+def create_rate_limit_backend() -> RateLimitBackend:
+    if RATE_LIMIT_BACKEND == "memory":
+        return InMemoryBackend()
+    return RedisBackend(redis_client)
+
+
+rate_limit_backend = create_rate_limit_backend()
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    return rate_limit_backend
+
+
+@asynccontextmanager
+async def rate_limit_lifespan(app: FastAPI):
+    """
+    Open the async rate limit backend for the lifetime of the app.
+
+    With the Redis backend this creates a blocking connection pool of
+    `RATE_LIMIT_REDIS_POOL_SIZE` connections; callers wait at most
+    `RATE_LIMIT_REDIS_TIMEOUT` seconds for a connection or a reply. The
+    in-memory backend is shared with the sync dependencies as is.
+    """
+    if RATE_LIMIT_BACKEND == "memory":
+        app.state.rate_limit_backend = rate_limit_backend
+        yield
+        return
+
+    pool = redis.asyncio.BlockingConnectionPool.from_url(
+        RATE_LIMIT_REDIS_URL,
+        max_connections=RATE_LIMIT_REDIS_POOL_SIZE,
+        timeout=RATE_LIMIT_REDIS_TIMEOUT,
+        socket_timeout=RATE_LIMIT_REDIS_TIMEOUT,
+        decode_responses=True,
+    )
+    client = redis.asyncio.StrictRedis(connection_pool=pool)
+    app.state.rate_limit_backend = AsyncRedisBackend(client)
+    try:
+        yield
+    finally:
+        await client.aclose()
+        await pool.aclose()
+
+
+def get_async_rate_limit_backend(request: Request):
+    backend = getattr(request.app.state, "rate_limit_backend", None)
+    if backend is None:
+        raise RuntimeError("rate_limit_lifespan is not installed on this app")
+    return backend
+
+
+async def resolve_decision(result):
+    # The in-memory backend answers synchronously, AsyncRedisBackend does not
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+RATE_LIMIT_HEADERS = [
+    "RateLimit-Limit",
+    "RateLimit-Remaining",
+    "RateLimit-Reset",
+    "Retry-After",
+]
+
+
+def gcra_headers(burst, decision):
+    """
+    Build the `RateLimit-*` (and, when rejected, `Retry-After`) headers for a
+    `gcra` decision.
+    """
+    allowed, remaining, retry_after, reset_after = decision
+    headers = {
+        "RateLimit-Limit": str(burst),
+        "RateLimit-Remaining": str(remaining),
+        "RateLimit-Reset": str(math.ceil(reset_after)),
+    }
+    if not allowed:
+        headers["Retry-After"] = str(math.ceil(retry_after))
+    return headers
+
+
+def _gcra_response_headers(burst, decision):
+    headers = gcra_headers(burst, decision)
+    if not decision[0]:
+        raise HTTPException(
+            status_code=429, detail="Too many requests", headers=headers
+        )
+    return headers
+
+
 def token_bucket_dependency(
     user_id: str,
-    max_tokens: int = 10,
-    refill_rate: int = 1,
-    redis_client: redis.StrictRedis = Depends(get_redis_client),
+    max_tokens: int = Query(10, gt=0),
+    refill_rate: float = Query(1, gt=0),
+    backend: RateLimitBackend = Depends(get_rate_limit_backend),
 ):
     """
     Provides a rate limiting dependency that implements a token bucket algorithm.
@@ -47,8 +541,8 @@ def token_bucket_dependency(
     Args:
         user_id (str): A unique identifier for the user or client making the requests.
         max_tokens (int, optional): The maximum number of tokens in the bucket. Defaults to 10.
-        refill_rate (int, optional): The rate at which tokens are refilled, in tokens per second. Defaults to 1.
-        redis_client (redis.StrictRedis): A Redis client instance used to store the token bucket state.
+        refill_rate (float, optional): The rate at which tokens are refilled, in tokens per second. Defaults to 1.
+        backend (RateLimitBackend): The backend used to store the token bucket state.
 
     Returns:
         dict: A dictionary with a "status" key indicating whether the request is allowed.
@@ -57,35 +551,18 @@ def token_bucket_dependency(
         HTTPException: If the token bucket is empty and the rate limit is exceeded.
     """
     key = f"token_bucket:{user_id}"
-    tokens, last_refill_time = redis_client.hmget(key, "tokens", "last_refill_time")
-
-    if tokens is None:
-        tokens = max_tokens
-        last_refill_time = time.time()
-    else:
-        tokens = int(tokens)
-        last_refill_time = float(last_refill_time)
-
-    # Refill tokens based on elapsed time
-    now = time.time()
-    tokens_to_add = (now - last_refill_time) * refill_rate
-    tokens = min(max_tokens, tokens + int(tokens_to_add))
-    last_refill_time = now
+    allowed, _ = backend.token_bucket(key, max_tokens, refill_rate, time.time())
 
-    if tokens <= 0:
+    if not allowed:
         raise HTTPException(status_code=429, detail="Too many requests")
-
-    # Decrement token and store back in Redis
-    tokens -= 1
-    redis_client.hmset(key, {"tokens": tokens, "last_refill_time": last_refill_time})
     return {"status": "Allowed"}
 
 
 def leaky_bucket_dependency(
     user_id: str,
-    capacity: int = 10,
-    leak_rate: float = 1,
-    redis_client: redis.StrictRedis = Depends(get_redis_client),
+    capacity: int = Query(10, gt=0),
+    leak_rate: float = Query(1, gt=0),
+    backend: RateLimitBackend = Depends(get_rate_limit_backend),
 ):
     """
     Provides a rate limiting dependency that implements a leaky bucket algorithm.
@@ -101,7 +578,7 @@ def leaky_bucket_dependency(
             Defaults to 10.
         leak_rate (float, optional): The rate at which requests "leak" out of the bucket,
             in requests per second. Defaults to 1.
-        redis_client (redis.StrictRedis): A Redis client instance used to store the leaky
+        backend (RateLimitBackend): The backend used to store the leaky
             bucket state.
 
     Returns:
@@ -111,30 +588,18 @@ def leaky_bucket_dependency(
         HTTPException: If the leaky bucket is full and the rate limit is exceeded.
     """
     key = f"leaky_bucket:{user_id}"
-    requests, last_check = redis_client.hmget(key, "requests", "last_check")
-    requests = int(requests) if requests else 0
-    last_check = float(last_check) if last_check else time.time()
-
-    # Calculate leaked tokens
-    now = time.time()
-    leaked = (now - last_check) * leak_rate
-    requests = max(0, requests - int(leaked))
-    last_check = now
+    allowed, _ = backend.leaky_bucket(key, capacity, leak_rate, time.time())
 
-    if requests >= capacity:
+    if not allowed:
         raise HTTPException(status_code=429, detail="Too many requests")
-
-    # Add a request and save the updated state
-    requests += 1
-    redis_client.hmset(key, {"requests": requests, "last_check": last_check})
     return {"status": "Allowed"}
 
 
 def fixed_window_counter_dependency(
     user_id: str,
-    max_requests: int = 10,
-    window_seconds: int = 60,
-    redis_client: redis.StrictRedis = Depends(get_redis_client),
+    max_requests: int = Query(10, gt=0),
+    window_seconds: int = Query(60, gt=0),
+    backend: RateLimitBackend = Depends(get_rate_limit_backend),
 ):
     """
     Provides a rate limiting dependency that implements a fixed window counter algorithm.
@@ -150,7 +615,7 @@ def fixed_window_counter_dependency(
             window. Defaults to 10.
         window_seconds (int, optional): The duration of the fixed time window, in seconds.
             Defaults to 60.
-        redis_client (redis.StrictRedis): A Redis client instance used to store the fixed
+        backend (RateLimitBackend): The backend used to store the fixed
             window counter state.
 
     Returns:
@@ -160,41 +625,36 @@ def fixed_window_counter_dependency(
         HTTPException: If the number of requests within the current window exceeds the
             max requests.
     """
+    key = f"fixed_window:{user_id}"
+    allowed, _ = backend.fixed_window(key, max_requests, window_seconds, time.time())
 
-    key = f"fixed_window:{user_id}:{int(time.time() // window_seconds)}"
-    requests = redis_client.get(key)
-
-    if requests and int(requests) >= max_requests:
+    if not allowed:
         raise HTTPException(status_code=429, detail="Too many requests")
-
-    # Increment request count with expiration
-    redis_client.incr(key)
-    redis_client.expire(key, window_seconds)
     return {"status": "Allowed"}
 
 
 def sliding_window_log_dependency(
     user_id: str,
-    max_requests: int = 10,
-    window_seconds: int = 60,
-    redis_client: redis.StrictRedis = Depends(get_redis_client),
+    max_requests: int = Query(10, gt=0),
+    window_seconds: int = Query(60, gt=0),
+    backend: RateLimitBackend = Depends(get_rate_limit_backend),
 ):
     """
-    Provides a rate limiting dependency that implements a sliding window counter algorithm.
+    Provides a rate limiting dependency that implements a sliding window log algorithm.
 
-    The sliding window counter algorithm allows a certain number of requests (the max requests)
-    to be made within a fixed time window (the window seconds). If the number of requests
-    within the current window exceeds the max requests, further requests are denied until
-    the next window starts.
+    The sliding window log algorithm records the time of every allowed request and
+    allows a new one only if fewer than max requests were logged within the last
+    window seconds. The log never holds more than max requests entries and expires
+    one window after the last request, so memory per client is O(max requests).
 
     Args:
         user_id (str): A unique identifier for the user or client making the requests.
         max_requests (int, optional): The maximum number of requests allowed within the
             window. Defaults to 10.
-        window_seconds (int, optional): The duration of the fixed time window, in seconds.
-            Defaults to 60.
-        redis_client (redis.StrictRedis): A Redis client instance used to store the sliding
-            window counter state.
+        window_seconds (int, optional): The duration of the sliding time window, in
+            seconds. Defaults to 60.
+        backend (RateLimitBackend): The backend used to store the sliding
+            window log.
 
     Returns:
         dict: A dictionary with a "status" key indicating whether the request is allowed.
@@ -203,29 +663,22 @@ def sliding_window_log_dependency(
         HTTPException: If the number of requests within the current window exceeds the
             max requests.
     """
-
     key = f"sliding_window_log:{user_id}"
-    now = time.time()
-
-    # Remove expired requests
-    redis_client.zremrangebyscore(key, 0, now - window_seconds)
+    allowed, _ = backend.sliding_window_log(
+        key, max_requests, window_seconds, time.time()
+    )
 
-    # Check request count
-    request_count = redis_client.zcard(key)
-    if request_count >= max_requests:
+    if not allowed:
         raise HTTPException(status_code=429, detail="Too many requests")
-
-    # Add new request timestamp
-    redis_client.zadd(key, {now: now})
     return {"status": "Allowed"}
 
 
 def sliding_window_counter_dependency(
     user_id: str,
-    max_requests: int = 10,
-    window_seconds: int = 60,
-    sub_window_seconds: int = 10,
-    redis_client: redis.StrictRedis = Depends(get_redis_client),
+    max_requests: int = Query(10, gt=0),
+    window_seconds: int = Query(60, gt=0),
+    sub_window_seconds: int = Query(10, gt=0),
+    backend: RateLimitBackend = Depends(get_rate_limit_backend),
 ):
     """
     Provides a rate limiting dependency that implements a sliding window counter algorithm.
@@ -243,7 +696,7 @@ def sliding_window_counter_dependency(
             Defaults to 60.
         sub_window_seconds (int, optional): The duration of the sub-windows, in seconds.
             Defaults to 10.
-        redis_client (redis.StrictRedis): A Redis client instance used to store the sliding
+        backend (RateLimitBackend): The backend used to store the sliding
             window counter state.
 
     Returns:
@@ -253,25 +706,165 @@ def sliding_window_counter_dependency(
         HTTPException: If the number of requests within the current window exceeds the
             max requests.
     """
-    now = int(time.time())
-    key_pattern = f"sliding_window_counter:{user_id}:{now // sub_window_seconds}"
-    window_start = now - window_seconds
-
-    # Aggregate counts within the sliding window
-    total_requests = sum(
-        int(
-            redis_client.get(
-                f"sliding_window_counter:{user_id}:{timestamp // sub_window_seconds}"
-            )
-            or 0
+    key = f"sliding_window_counter:{user_id}"
+    allowed, _ = backend.sliding_window_counter(
+        key, max_requests, window_seconds, sub_window_seconds, time.time()
+    )
+
+    if not allowed:
+        raise HTTPException(status_code=429, detail="Too many requests")
+    return {"status": "Allowed"}
+
+
+def gcra_dependency(
+    user_id: str,
+    response: Response,
+    rate: float = Query(1, gt=0),
+    burst: int = Query(10, gt=0),
+    backend: RateLimitBackend = Depends(get_rate_limit_backend),
+):
+    """
+    Provides a rate limiting dependency that implements the Generic Cell Rate Algorithm.
+
+    GCRA tracks a single theoretical arrival time (TAT) per user. Each request moves
+    the TAT forward by one emission interval (1 / rate), and a request is rejected
+    when the TAT would run more than `burst` intervals ahead of the current time.
+    The result is the same as a token bucket, but only one value is stored per user.
+
+    Args:
+        user_id (str): A unique identifier for the user or client making the requests.
+        response (Response): The outgoing response, used to set the rate limit headers.
+        rate (float, optional): The sustained rate, in requests per second. Defaults to 1.
+        burst (int, optional): The number of requests that may be made at once.
+            Defaults to 10.
+        backend (RateLimitBackend): The backend used to store the
+            theoretical arrival time.
+
+    Returns:
+        dict: A dictionary with a "status" key indicating whether the request is allowed.
+
+    Raises:
+        HTTPException: If the request arrives before the theoretical arrival time
+            allows it. The exception carries a `Retry-After` header.
+    """
+    key = f"gcra:{user_id}"
+
+    decision = backend.gcra(key, 1 / rate, burst, time.time())
+
+    response.headers.update(_gcra_response_headers(burst, decision))
+    return {"status": "Allowed"}
+
+
+async def async_token_bucket_dependency(
+    user_id: str,
+    max_tokens: int = Query(10, gt=0),
+    refill_rate: float = Query(1, gt=0),
+    backend=Depends(get_async_rate_limit_backend),
+):
+    """
+    Async version of `token_bucket_dependency`.
+    """
+    key = f"token_bucket:{user_id}"
+    allowed, _ = await resolve_decision(
+        backend.token_bucket(key, max_tokens, refill_rate, time.time())
+    )
+
+    if not allowed:
+        raise HTTPException(status_code=429, detail="Too many requests")
+    return {"status": "Allowed"}
+
+
+async def async_leaky_bucket_dependency(
+    user_id: str,
+    capacity: int = Query(10, gt=0),
+    leak_rate: float = Query(1, gt=0),
+    backend=Depends(get_async_rate_limit_backend),
+):
+    """
+    Async version of `leaky_bucket_dependency`.
+    """
+    key = f"leaky_bucket:{user_id}"
+    allowed, _ = await resolve_decision(
+        backend.leaky_bucket(key, capacity, leak_rate, time.time())
+    )
+
+    if not allowed:
+        raise HTTPException(status_code=429, detail="Too many requests")
+    return {"status": "Allowed"}
+
+
+async def async_fixed_window_counter_dependency(
+    user_id: str,
+    max_requests: int = Query(10, gt=0),
+    window_seconds: int = Query(60, gt=0),
+    backend=Depends(get_async_rate_limit_backend),
+):
+    """
+    Async version of `fixed_window_counter_dependency`.
+    """
+    key = f"fixed_window:{user_id}"
+    allowed, _ = await resolve_decision(
+        backend.fixed_window(key, max_requests, window_seconds, time.time())
+    )
+
+    if not allowed:
+        raise HTTPException(status_code=429, detail="Too many requests")
+    return {"status": "Allowed"}
+
+
+async def async_sliding_window_log_dependency(
+    user_id: str,
+    max_requests: int = Query(10, gt=0),
+    window_seconds: int = Query(60, gt=0),
+    backend=Depends(get_async_rate_limit_backend),
+):
+    """
+    Async version of `sliding_window_log_dependency`.
+    """
+    key = f"sliding_window_log:{user_id}"
+    allowed, _ = await resolve_decision(
+        backend.sliding_window_log(key, max_requests, window_seconds, time.time())
+    )
+
+    if not allowed:
+        raise HTTPException(status_code=429, detail="Too many requests")
+    return {"status": "Allowed"}
+
+
+async def async_sliding_window_counter_dependency(
+    user_id: str,
+    max_requests: int = Query(10, gt=0),
+    window_seconds: int = Query(60, gt=0),
+    sub_window_seconds: int = Query(10, gt=0),
+    backend=Depends(get_async_rate_limit_backend),
+):
+    """
+    Async version of `sliding_window_counter_dependency`.
+    """
+    key = f"sliding_window_counter:{user_id}"
+    allowed, _ = await resolve_decision(
+        backend.sliding_window_counter(
+            key, max_requests, window_seconds, sub_window_seconds, time.time()
         )
-        for timestamp in range(window_start, now, sub_window_seconds)
     )
 
-    if total_requests >= max_requests:
+    if not allowed:
         raise HTTPException(status_code=429, detail="Too many requests")
+    return {"status": "Allowed"}
+
+
+async def async_gcra_dependency(
+    user_id: str,
+    response: Response,
+    rate: float = Query(1, gt=0),
+    burst: int = Query(10, gt=0),
+    backend=Depends(get_async_rate_limit_backend),
+):
+    """
+    Async version of `gcra_dependency`.
+    """
+    key = f"gcra:{user_id}"
+    decision = await resolve_decision(backend.gcra(key, 1 / rate, burst, time.time()))
 
-    # Increment the request count in the current sub-window
-    redis_client.incr(key_pattern)
-    redis_client.expire(key_pattern, window_seconds)
+    response.headers.update(_gcra_response_headers(burst, decision))
     return {"status": "Allowed"}
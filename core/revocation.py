@@ -0,0 +1,225 @@
+"""
+Token revocation by `jti`, answered in-process for tokens that are not revoked.
+
+Redis holds the authoritative list. Revoking a token sets `revoked:<jti>`,
+which expires with the token, and appends the `jti` to the `revocations`
+stream. The stream is trimmed to the longest token lifetime.
+
+Every service mirrors the stream into a `BloomFilter`. A background thread
+reads only the entries added since its last sync, every
+`REVOCATION_SYNC_SECONDS`. A filter miss proves that the token was not
+revoked, which is the common case, and costs k hash lookups without I/O.
+Only a filter hit, i.e. a revoked token or a false positive, costs a Redis
+lookup. A Bloom filter cannot forget, so it is rebuilt from the trimmed
+stream once it holds more than its capacity.
+
+A revocation made elsewhere is seen within one sync interval. Until the
+first sync, every check goes to Redis. A check that needs Redis while it is
+unreachable fails closed.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+import redis
+import redis.asyncio
+
+from core.config import (
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    REVOCATION_FILTER_CAPACITY,
+    REVOCATION_FILTER_ERROR_RATE,
+    REVOCATION_REDIS_URL,
+    REVOCATION_SYNC_SECONDS,
+)
+from core.custom_logging import get_service_logger
+
+logger = get_service_logger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter sized for `capacity` items at `error_rate`.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return ((first + index * step) % self.size for index in range(self.hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class RevocationList:
+    """
+    Redis-backed `jti` revocation list with a local Bloom filter mirror.
+
+    With `background_sync=False` no thread is started and the caller drives
+    `sync()` itself.
+    """
+
+    STREAM = "revocations"
+    BATCH = 1000
+
+    def __init__(
+        self,
+        client: redis.StrictRedis,
+        async_client: redis.asyncio.StrictRedis,
+        capacity: int = REVOCATION_FILTER_CAPACITY,
+        error_rate: float = REVOCATION_FILTER_ERROR_RATE,
+        sync_interval: float = REVOCATION_SYNC_SECONDS,
+        retention: float = REFRESH_TOKEN_EXPIRE_DAYS * 86400,
+        background_sync: bool = True,
+    ):
+        self.client = client
+        self.async_client = async_client
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.retention = retention
+        self.background_sync = background_sync
+        self.filter_misses = 0
+        self.lookups = 0
+        self.false_positives = 0
+        self.rebuilds = 0
+        self._filter = BloomFilter(capacity, error_rate)
+        self._last_id: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _key(jti: str) -> str:
+        return f"revoked:{jti}"
+
+    async def revoke(self, jti: str, expires_at: float):
+        """
+        Revoke a token until `expires_at`, when it would be rejected anyway.
+        """
+        now = time.time()
+        ttl = int(math.ceil(expires_at - now))
+        if ttl <= 0:
+            return
+        async with self.async_client.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(jti), 1, ex=ttl)
+            pipe.xadd(
+                self.STREAM,
+                {"jti": jti, "exp": expires_at},
+                minid=f"{int((now - self.retention) * 1000)}-0",
+            )
+            await pipe.execute()
+        self._filter.add(jti)
+
+    async def is_revoked(self, jti: str) -> bool:
+        """
+        Whether the token with this `jti` has been revoked.
+        """
+        if self._thread is None and self.background_sync:
+            self.start()
+        if self._last_id is not None and jti not in self._filter:
+            self.filter_misses += 1
+            return False
+
+        self.lookups += 1
+        try:
+            revoked = bool(await self.async_client.exists(self._key(jti)))
+        except redis.RedisError:
+            logger.exception("Revocation lookup failed; treating token as revoked")
+            return True
+        if not revoked and self._last_id is not None:
+            self.false_positives += 1
+        return revoked
+
+    def _read(self, after: Optional[str]):
+        start = f"({after}" if after else "-"
+        while True:
+            entries = self.client.xrange(self.STREAM, min=start, count=self.BATCH)
+            yield from entries
+            if len(entries) < self.BATCH:
+                return
+            start = f"({entries[-1][0]}"
+
+    def sync(self) -> None:
+        """
+        Add the revocations made since the last sync, rebuilding when full.
+        """
+        with self._lock:
+            rebuild = self._last_id is None or self._filter.count > self.capacity
+            bloom = (
+                BloomFilter(max(self.capacity, 2 * self._filter.count), self.error_rate)
+                if rebuild
+                else self._filter
+            )
+            now = time.time()
+            last_id = None if rebuild else self._last_id
+            for entry_id, fields in self._read(last_id):
+                last_id = entry_id
+                if float(fields["exp"]) > now:
+                    bloom.add(fields["jti"])
+            if rebuild:
+                self.capacity = bloom.capacity
+                self._filter = bloom
+                self.rebuilds += 1
+            # An empty stream still counts as synced
+            self._last_id = last_id or self._last_id or "0-0"
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.sync()
+            except redis.RedisError:
+                logger.exception("Revocation list sync failed")
+            if self._stop.wait(self.sync_interval):
+                return
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="revocation-sync", daemon=True
+            )
+            self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "filter_items": self._filter.count,
+            "filter_capacity": self.capacity,
+            "filter_misses": self.filter_misses,
+            "lookups": self.lookups,
+            "false_positives": self.false_positives,
+            "rebuilds": self.rebuilds,
+        }
+
+
+revocations = RevocationList(
+    redis.StrictRedis.from_url(REVOCATION_REDIS_URL, decode_responses=True),
+    redis.asyncio.StrictRedis.from_url(REVOCATION_REDIS_URL, decode_responses=True),
+)
@@ -1,7 +1,14 @@
 from typing import Optional, List
 from pydantic import BaseModel, SecretStr
 from sqlmodel import Field
-from datetime import datetime
+from datetime import date, datetime
+from core.models import (
+    Customer,
+    Employee,
+    Order,
+    OrderDetail,
+    Payment,
+)
 
 
 class Token(BaseModel):
@@ -15,6 +22,7 @@ class User(BaseModel):
     userName: str
     fullName: str
     email: Optional[str] = None
+    disabled: bool = False
     token: Optional[Token] = None
 
 
@@ -110,3 +118,82 @@ class OrderWithDetails(OrderRead):
 
 class PaymentWithOrder(PaymentRead):
     order: OrderRead
+
+
+# ProductLine without its deferred html_description and image columns
+class ProductLineRead(BaseModel):
+    product_line: str
+    text_description: Optional[str] = None
+
+
+# Read models for list endpoints supporting ?include=
+class ProductWithLine(BaseModel):
+    product_code: str
+    product_name: str
+    product_line: str
+    product_scale: str
+    product_vendor: str
+    product_description: str
+    quantity_in_stock: int
+    buy_price: float
+    msrp: float
+    product_lines: Optional[ProductLineRead] = None
+
+
+class OrderWithRelations(BaseModel):
+    order_number: int
+    order_date: date
+    required_date: date
+    shipped_date: Optional[date] = None
+    status: str
+    comments: Optional[str] = None
+    customer_number: int
+    customer: Optional[Customer] = None
+    order_details: Optional[List[OrderDetail]] = None
+
+
+class CustomerWithRelations(BaseModel):
+    customer_number: int
+    customer_name: str
+    contact_last_name: str
+    contact_first_name: str
+    phone: str
+    address_line1: str
+    address_line2: Optional[str] = None
+    city: str
+    state: Optional[str] = None
+    postal_code: Optional[str] = None
+    country: str
+    sales_rep_employee_number: Optional[int] = None
+    credit_limit: Optional[float] = None
+    sales_rep_employee: Optional[Employee] = None
+    orders: Optional[List[Order]] = None
+    payments: Optional[List[Payment]] = None
+
+
+# Aggregate order view returned by /orders/{order_number}/full
+class OrderLine(BaseModel):
+    product_code: str
+    product_name: Optional[str] = None
+    quantity_ordered: int
+    price_each: float
+    order_line_number: int
+    line_total: float
+
+
+class OrderFull(BaseModel):
+    order: Order
+    lines: List[OrderLine] = []
+    total: float
+
+
+# Bulk create/upsert results
+class BulkRowError(BaseModel):
+    index: int
+    error: str
+
+
+class BulkResult(BaseModel):
+    received: int
+    written: int
+    errors: List[BulkRowError] = []
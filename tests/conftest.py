@@ -0,0 +1,224 @@
+import importlib.util
+import os
+import sys
+from datetime import date
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+import rsa
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import core.jwks  # noqa: E402
+import core.jwt_auth  # noqa: E402
+from core.database import get_async_session  # noqa: E402
+from core.jwks import JWKSCache, SigningKey  # noqa: E402
+from core.models import (  # noqa: E402
+    Customer,
+    Employee,
+    Office,
+    Order,
+    OrderDetail,
+    Payment,
+    Product,
+    ProductLine,
+    User,
+)
+from core.revocation import RevocationList  # noqa: E402
+
+
+def load_router(relative_path: str):
+    """
+    Import a service router module by path; every service has its own `routers`.
+    """
+    name = relative_path.replace("/", "_").removesuffix(".py")
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(ROOT, relative_path)
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.router
+
+
+def seed(path: str, rows: int):
+    """
+    Fill a fresh SQLite database with `rows` customers, products and orders.
+    """
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(
+            Office(
+                office_code="1",
+                city="Boston",
+                phone="555",
+                address_line1="1 Main St",
+                country="USA",
+                postal_code="02101",
+                territory="NA",
+            )
+        )
+        session.add(
+            Employee(
+                employee_number=1,
+                last_name="Rep",
+                first_name="Sales",
+                extension="x1",
+                email="rep@example.com",
+                office_code="1",
+                job_title="Sales Rep",
+            )
+        )
+        session.add(ProductLine(product_line="Cars", text_description="Cars"))
+        for n in range(rows):
+            session.add(
+                Customer(
+                    customer_number=n,
+                    customer_name=f"Customer {n}",
+                    contact_last_name="Doe",
+                    contact_first_name="Jo",
+                    phone="555",
+                    address_line1="1 Main St",
+                    city="Boston",
+                    country="USA",
+                    sales_rep_employee_number=1,
+                )
+            )
+            session.add(
+                Product(
+                    product_code=f"P{n:04d}",
+                    product_name=f"Product {n}",
+                    product_line="Cars",
+                    product_scale="1:10",
+                    product_vendor="Vendor",
+                    product_description="A product",
+                    quantity_in_stock=10,
+                    buy_price=5.0,
+                    msrp=10.0,
+                )
+            )
+            session.add(
+                Order(
+                    order_number=n,
+                    order_date=date(2024, 1, 1),
+                    required_date=date(2024, 1, 8),
+                    status="Shipped",
+                    customer_number=n,
+                )
+            )
+            session.add(
+                OrderDetail(
+                    order_number=n,
+                    product_code=f"P{n:04d}",
+                    quantity_ordered=2,
+                    price_each=10.0,
+                    order_line_number=1,
+                )
+            )
+            session.add(
+                Payment(
+                    customer_number=n,
+                    check_number=f"C{n}",
+                    payment_date=date(2024, 1, 2),
+                    amount=20.0,
+                )
+            )
+        session.commit()
+    engine.dispose()
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """
+    Build an app serving the given routers from a seeded SQLite database.
+
+    Returns the app and a counter of the SQL statements it executes.
+    """
+
+    def factory(routers, rows: int = 10, **engine_options):
+        path = str(tmp_path / f"db{rows}.sqlite")
+        seed(path, rows)
+        engine_options.setdefault("poolclass", NullPool)
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}", **engine_options)
+
+        async def session_override():
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                yield session
+
+        app = FastAPI()
+        for router in routers:
+            app.include_router(router)
+        app.dependency_overrides[get_async_session] = session_override
+        app.state.engine = engine
+        return app, StatementCounter(engine)
+
+    return factory
+
+
+@pytest.fixture(scope="session")
+def private_key_path(tmp_path_factory):
+    # 1024 bits keeps key generation fast; never use such a key outside tests
+    _, private_key = rsa.newkeys(1024)
+    path = tmp_path_factory.mktemp("keys") / "signing.pem"
+    path.write_bytes(private_key.save_pkcs1())
+    return str(path)
+
+
+@pytest.fixture
+def auth(monkeypatch, private_key_path):
+    """
+    Make this process the auth service, with revocations kept in fakeredis.
+    """
+    signing_key = SigningKey(private_key_path)
+    monkeypatch.setattr(core.jwks, "signing_key", signing_key)
+    monkeypatch.setattr(core.jwt_auth, "signing_key", signing_key)
+    jwks_cache = JWKSCache(url=None, on_removed=core.jwt_auth.claims_cache.clear)
+    jwks_cache.refresh()
+    monkeypatch.setattr(core.jwt_auth, "jwks_cache", jwks_cache)
+    server = fakeredis.FakeServer()
+    revocations = RevocationList(
+        fakeredis.FakeStrictRedis(server=server, decode_responses=True),
+        fakeredis.aioredis.FakeRedis(server=server, decode_responses=True),
+        background_sync=False,
+    )
+    revocations.sync()
+    monkeypatch.setattr(core.jwt_auth, "revocations", revocations)
+    core.jwt_auth.claims_cache.clear()
+    core.jwt_auth.user_cache.clear()
+    yield
+    core.jwt_auth.jwks_cache.close()
+    core.jwt_auth.claims_cache.clear()
+    core.jwt_auth.user_cache.clear()
+
+
+def add_users(path: str, count: int):
+    engine = create_engine(f"sqlite:///{path}")
+    with Session(engine) as session:
+        session.add_all(
+            User(
+                user_id=n,
+                username=f"user{n}",
+                full_name=f"User {n}",
+                hashed_password="unused",
+            )
+            for n in range(count)
+        )
+        session.commit()
+    engine.dispose()
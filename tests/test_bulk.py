@@ -0,0 +1,40 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import core.bulk
+from conftest import load_router
+
+payment_router = load_router("PaymentService/app/routers/payment.py")
+
+PAYMENT = {
+    "customer_number": 1,
+    "check_number": "NEW1",
+    "payment_date": "2024-02-01",
+    "amount": 12.5,
+}
+
+
+@pytest.fixture
+def client(make_app):
+    app, _ = make_app([payment_router], 2)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_non_object_elements_are_row_errors(client):
+    body = [PAYMENT, "not a row", [1, 2], {**PAYMENT, "amount": "lots"}, None]
+    response = client.post("/payments/bulk", json=body)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["received"] == 5
+    assert result["written"] == 1
+    assert [error["index"] for error in result["errors"]] == [1, 2, 3, 4]
+    assert result["errors"][0]["error"] == "Row must be a JSON object"
+    assert client.get("/payments/1/NEW1").json()["amount"] == 12.5
+
+
+def test_unsupported_dialect_is_501(client, monkeypatch):
+    monkeypatch.setattr(core.bulk, "UPSERT_DIALECTS", ("mysql",))
+    response = client.post("/payments/bulk", json=[PAYMENT])
+    assert response.status_code == 501
+    assert response.json() == {"detail": "Bulk upsert is not supported on sqlite"}
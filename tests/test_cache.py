@@ -0,0 +1,37 @@
+import asyncio
+from decimal import Decimal
+
+import fakeredis.aioredis
+
+from core.cache import TieredCache
+
+
+def test_unencodable_value_skips_the_redis_tier():
+    async def scenario():
+        client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        cache = TieredCache("test", redis_client=client)
+        await cache.set("price", {"msrp": Decimal("9.99")})
+        assert await cache.get("price") == {"msrp": Decimal("9.99")}
+        assert await client.get("cache:test:price") is None
+
+        await cache.set("image", {"image": b"\x89PNG"})
+        cache.local.clear()
+        assert await cache.get("image") == {"image": b"\x89PNG"}
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["redis_failures"] == 1
+    assert stats["redis_hits"] == 1
+
+
+def test_unreadable_entry_is_a_miss():
+    async def scenario():
+        client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        cache = TieredCache("test", redis_client=client)
+        await client.set("cache:test:broken", "{not json")
+        return await cache.get("broken"), cache.stats()
+
+    value, stats = asyncio.run(scenario())
+    assert value is None
+    assert stats["redis_failures"] == 1
+    assert stats["misses"] == 1
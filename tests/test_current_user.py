@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from fastapi import APIRouter, Depends
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from conftest import add_users
+from core.jwt_auth import (
+    create_access_token,
+    create_refresh_token,
+    get_current_user,
+    user_cache,
+)
+from core.schemas import User
+
+POOL_SIZE = 2
+
+router = APIRouter()
+
+
+@router.get("/me")
+async def me(user: User = Depends(get_current_user)):
+    return {"user_id": user.userId}
+
+
+def tokens(subject: str, access_minutes: float = 5):
+    return {
+        "X-Access-Token": create_access_token(
+            {"sub": subject}, timedelta(minutes=access_minutes)
+        ),
+        "X-Refresh-Token": create_refresh_token({"sub": subject}),
+    }
+
+
+def test_get_current_user_returns_every_connection(make_app, auth):
+    # A leaked connection would exhaust this pool and time out the next request
+    app, counter = make_app(
+        [router],
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=1,
+    )
+    engine = app.state.engine
+    add_users(engine.url.database, 1)
+
+    cases = [
+        (tokens("0"), 200),
+        (tokens("999"), 401),  # unknown user
+        (tokens("not-a-number"), 401),  # malformed subject
+        (tokens("0", access_minutes=-1), 200),  # expired access, valid refresh
+        ({"X-Access-Token": "junk", "X-Refresh-Token": "junk"}, 401),
+    ]
+    with TestClient(app) as client:
+        for _ in range(5 * POOL_SIZE):
+            for headers, status_code in cases:
+                user_cache.clear()
+                response = client.get("/me", headers=headers)
+                assert response.status_code == status_code, response.text
+
+    assert counter.count > 0
+    assert engine.pool.checkedout() == 0
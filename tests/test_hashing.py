@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+import core.jwt_auth as jwt_auth
+from core.hashing import HashingPool
+
+
+@pytest.fixture
+def pool():
+    pool = HashingPool(
+        CryptContext(schemes=["bcrypt"], bcrypt__rounds=4), workers=1, max_queue=1
+    )
+    yield pool
+    pool.shutdown()
+
+
+def test_cancelled_request_keeps_its_slot_until_the_work_finishes(pool):
+    release = threading.Event()
+
+    async def scenario():
+        started = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        def blocking():
+            loop.call_soon_threadsafe(started.set)
+            release.wait()
+
+        try:
+            running = asyncio.create_task(pool.run(blocking))
+            await started.wait()
+            queued = asyncio.create_task(pool.run(lambda: None))
+            await asyncio.sleep(0)
+            running.cancel()
+            queued.cancel()
+            await asyncio.gather(running, queued, return_exceptions=True)
+
+            # The work that never started is gone; the running one is still counted
+            assert pool.pending == 1
+            waiting = asyncio.create_task(pool.run(lambda: None))
+            await asyncio.sleep(0)
+            assert pool.pending == 2
+            with pytest.raises(HTTPException) as rejected:
+                await pool.run(lambda: None)
+            assert rejected.value.status_code == 503
+        finally:
+            release.set()
+        await waiting
+        while pool.pending:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert pool.stats()["completed"] == 2
+    assert pool.stats()["rejected"] == 1
+
+
+def test_password_helpers_run_on_the_pool(monkeypatch, pool):
+    monkeypatch.setattr(jwt_auth, "hashing_pool", pool)
+
+    async def scenario():
+        hashed = await jwt_auth.get_password_hash("secret")
+        return (
+            await jwt_auth.verify_password("secret", hashed),
+            await jwt_auth.verify_password("wrong", hashed),
+        )
+
+    assert asyncio.run(scenario()) == (True, False)
+    assert pool.stats()["completed"] == 3
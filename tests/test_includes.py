@@ -0,0 +1,52 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import load_router
+
+customer_router = load_router("CustomerService/app/customer.py")
+order_router = load_router("OrderService/app/routers/orders.py")
+product_router = load_router("ProductService/app/routers/product.py")
+product_line_router = load_router("ProductService/app/routers/product_lines.py")
+
+# (path, statements per request), whatever the number of rows returned
+CASES = [
+    ("/customers/?include=orders,payments,sales_rep", 3),
+    ("/products/?include=product_line", 1),
+    ("/orders/?include=customer,order_details", 2),
+    ("/orders/full?" + "&".join(f"order_number={n}" for n in range(20)), 1),
+    ("/productlines/", 1),
+]
+
+
+@pytest.mark.parametrize("path,statements", CASES)
+@pytest.mark.parametrize("rows", [1, 20])
+def test_statement_count_is_fixed(make_app, path, statements, rows):
+    app, counter = make_app(
+        [customer_router, order_router, product_router, product_line_router], rows
+    )
+    with TestClient(app) as client:
+        response = client.get(path)
+    assert response.status_code == 200, response.text
+    assert counter.count == statements
+    body = response.json()
+    if path.startswith(("/customers", "/products", "/orders/?")):
+        assert len(body) == rows
+
+
+def test_includes_are_embedded(make_app):
+    app, _ = make_app([customer_router, product_router], 2)
+    with TestClient(app) as client:
+        customers = client.get("/customers/?include=orders,payments,sales_rep").json()
+        products = client.get("/products/?include=product_line").json()
+    assert customers[0]["orders"][0]["order_number"] == 0
+    assert customers[0]["payments"][0]["check_number"] == "C0"
+    assert customers[0]["sales_rep_employee"]["employee_number"] == 1
+    assert products[0]["product_lines"]["product_line"] == "Cars"
+
+
+def test_unknown_include_is_rejected(make_app):
+    app, counter = make_app([product_router])
+    with TestClient(app) as client:
+        response = client.get("/products/?include=nope")
+    assert response.status_code == 400
+    assert counter.count == 0
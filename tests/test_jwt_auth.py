@@ -0,0 +1,160 @@
+import base64
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import JWTError, jwt
+
+import core.jwks
+import core.jwt_auth
+import core.lifespan
+from conftest import ROOT
+from core.jwks import JWKSCache, SigningKey
+from core.jwt_auth import create_access_token, decode_token
+from core.lifespan import include_auth_routes, service_lifespan
+from core.rate_limit_middleware import request_identity
+from test_current_user import router as current_user_router
+
+
+def _segment(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).rstrip(b"=").decode()
+
+
+def forged(header) -> str:
+    return f"{_segment(header)}.{_segment({'sub': '1'})}.c2ln"
+
+
+def test_signed_token_verifies_locally(auth):
+    token = create_access_token({"sub": "7"})
+    header = jwt.get_unverified_header(token)
+    assert header["alg"] == "RS256"
+    assert isinstance(header["kid"], str)
+    assert decode_token(token)["sub"] == "7"
+
+
+@pytest.mark.parametrize(
+    "kid", [["a"], {"a": 1}, 1, None], ids=["list", "dict", "int", "missing"]
+)
+def test_malformed_kid_is_a_jwt_error(auth, kid):
+    header = {"alg": "RS256", "typ": "JWT"}
+    if kid is not None:
+        header["kid"] = kid
+    with pytest.raises(JWTError):
+        decode_token(forged(header))
+
+
+def test_malformed_kid_falls_back_to_client_ip():
+    token = forged({"alg": "RS256", "kid": ["a"]})
+    scope = {
+        "type": "http",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("10.0.0.1", 1234),
+    }
+    assert request_identity(scope) == "ip:10.0.0.1"
+
+
+def test_malformed_kid_is_rejected_with_401(make_app, auth):
+    app, _ = make_app([current_user_router])
+    token = forged({"alg": "RS256", "kid": {"a": 1}})
+    with TestClient(app) as client:
+        response = client.get(
+            "/me", headers={"X-Access-Token": token, "X-Refresh-Token": token}
+        )
+    assert response.status_code == 401
+
+
+class SlowJWKSCache(JWKSCache):
+    """
+    A JWKS endpoint that takes 0.5 s to answer and publishes `document`.
+    """
+
+    document = {"keys": []}
+
+    def fetch(self):
+        time.sleep(0.5)
+        return self.document
+
+
+def test_unknown_kid_never_waits_for_a_fetch(auth):
+    kid, _ = core.jwks.signing_key.get()
+    cache = SlowJWKSCache(refresh_interval=3600, min_refresh_interval=0)
+    try:
+        started = time.perf_counter()
+        assert cache.get(kid) is None  # cold: the first fetch is still running
+        assert cache.get("made-up") is None
+        assert time.perf_counter() - started < 0.1
+
+        deadline = time.monotonic() + 5
+        while cache.stats()["refreshes"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert cache.get(kid) is None
+
+        # Rotation: the unknown kid woke the thread, which now finds the key
+        cache.document = core.jwks.jwks_document()
+        while cache.get(kid) is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert cache.get(kid) is not None
+        assert cache.stats()["refreshes"] >= 2
+    finally:
+        cache.close()
+
+
+def test_refresh_does_not_hold_the_lock_while_fetching(auth):
+    cache = SlowJWKSCache(refresh_interval=3600)
+    cache.start()
+    try:
+        time.sleep(0.1)  # the first fetch is now in flight
+        started = time.perf_counter()
+        with cache._lock:
+            pass
+        assert time.perf_counter() - started < 0.1
+    finally:
+        cache.close()
+
+
+def test_importing_jwt_auth_starts_no_thread():
+    script = (
+        "import threading, core.jwt_auth, core.rate_limit_middleware;"
+        "print(sorted(thread.name for thread in threading.enumerate()))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert "jwks-refresh" not in result.stdout
+
+
+def test_lifespan_starts_and_stops_the_jwks_refresh(auth):
+    app = FastAPI(lifespan=service_lifespan)
+    with TestClient(app):
+        assert core.jwt_auth.jwks_cache._thread is not None
+    assert core.jwt_auth.jwks_cache._thread is None
+
+
+def test_missing_key_settings_are_logged(auth, monkeypatch, caplog):
+    monkeypatch.setattr(core.jwt_auth, "signing_key", SigningKey(None))
+    monkeypatch.setattr(core.jwt_auth.jwks_cache, "url", None)
+    monkeypatch.setattr(core.jwt_auth, "JWT_PUBLIC_KEYS_DIR", None)
+    with TestClient(FastAPI(lifespan=service_lifespan)):
+        pass
+    assert "No token keys configured" in caplog.text
+
+
+def test_only_the_key_holder_publishes_the_jwks(auth, monkeypatch):
+    monkeypatch.setattr(core.lifespan, "signing_key", SigningKey(None))
+    verifier = FastAPI()
+    include_auth_routes(verifier)
+    assert TestClient(verifier).get("/.well-known/jwks.json").status_code == 404
+
+    monkeypatch.setattr(core.lifespan, "signing_key", core.jwks.signing_key)
+    issuer = FastAPI()
+    include_auth_routes(issuer)
+    response = TestClient(issuer).get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    token = create_access_token({"sub": "7"})
+    kids = [key["kid"] for key in response.json()["keys"]]
+    assert jwt.get_unverified_header(token)["kid"] in kids
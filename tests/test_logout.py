@@ -0,0 +1,65 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import core.jwt_auth
+import core.lifespan
+from conftest import add_users
+from core.jwks import SigningKey
+from core.lifespan import include_auth_routes
+from test_current_user import router as current_user_router
+from test_current_user import tokens
+
+
+@pytest.fixture
+def client(make_app, auth, monkeypatch):
+    monkeypatch.setattr(core.lifespan, "signing_key", core.jwt_auth.signing_key)
+    app, _ = make_app([current_user_router])
+    add_users(app.state.engine.url.database, 2)
+    include_auth_routes(app)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_logout_revokes_both_tokens(client):
+    headers = tokens("0")
+    assert client.get("/me", headers=headers).status_code == 200
+
+    assert client.post("/auth/logout", headers=headers).status_code == 204
+
+    response = client.get("/me", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Access token has been revoked"
+    # Without a valid access token the refresh token is tried, and is revoked too
+    expired_access = {
+        "X-Access-Token": tokens("0", access_minutes=-1)["X-Access-Token"],
+        "X-Refresh-Token": headers["X-Refresh-Token"],
+    }
+    response = client.get("/me", headers=expired_access)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Refresh token has been revoked"
+    assert core.jwt_auth.revocations.stats()["lookups"] > 0
+
+
+def test_logout_with_an_expired_access_token_revokes_the_refresh_token(client):
+    headers = tokens("0", access_minutes=-1)
+    assert client.post("/auth/logout", headers=headers).status_code == 204
+    response = client.get("/me", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Refresh token has been revoked"
+
+
+def test_logout_needs_a_valid_token_of_one_user(client):
+    junk = {"X-Access-Token": "junk", "X-Refresh-Token": "junk"}
+    assert client.post("/auth/logout", headers=junk).status_code == 401
+
+    mixed = {**tokens("0"), "X-Refresh-Token": tokens("1")["X-Refresh-Token"]}
+    assert client.post("/auth/logout", headers=mixed).status_code == 401
+    assert client.get("/me", headers=mixed).status_code == 200
+
+
+def test_logout_is_only_mounted_on_the_auth_service(make_app, auth, monkeypatch):
+    monkeypatch.setattr(core.lifespan, "signing_key", SigningKey(None))
+    app, _ = make_app([current_user_router])
+    include_auth_routes(app)
+    with TestClient(app) as client:
+        assert client.post("/auth/logout", headers=tokens("0")).status_code == 404
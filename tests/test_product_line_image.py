@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from core.config import BLOB_CHUNK_SIZE
+from conftest import load_router
+
+product_line_router = load_router("ProductService/app/routers/product_lines.py")
+
+IMAGE = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 1000
+
+
+@pytest.fixture
+def client(make_app):
+    app, counter = make_app([product_line_router], 1)
+    path = app.state.engine.url.database
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE productlines SET image = ?", (IMAGE,))
+    with TestClient(app) as client:
+        client.counter = counter
+        yield client
+
+
+def test_full_image_is_streamed_in_chunks(client):
+    response = client.get("/productlines/Cars/image")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["content-length"] == str(len(IMAGE))
+    assert response.content == IMAGE
+    # One length/type query, then one read per chunk
+    assert client.counter.count == 1 + -(-len(IMAGE) // BLOB_CHUNK_SIZE)
+
+
+@pytest.mark.parametrize(
+    "header,start,end",
+    [
+        ("bytes=10-19", 10, 19),
+        ("bytes=70000-", 70000, len(IMAGE) - 1),
+        ("bytes=-7", len(IMAGE) - 7, len(IMAGE) - 1),
+    ],
+)
+def test_range_is_served(client, header, start, end):
+    response = client.get("/productlines/Cars/image", headers={"Range": header})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(IMAGE)}"
+    assert response.content == IMAGE[start : end + 1]
+
+
+def test_unsatisfiable_range(client):
+    response = client.get(
+        "/productlines/Cars/image", headers={"Range": f"bytes={len(IMAGE)}-"}
+    )
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(IMAGE)}"
+
+
+def test_missing_image(client):
+    assert client.get("/productlines/Nope/image").status_code == 404
@@ -0,0 +1,76 @@
+import fakeredis
+import fakeredis.aioredis
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from core.rate_limit_leases import (
+    AsyncLeasedTokenBucket,
+    LeasedTokenBucket,
+    async_leased_token_bucket_dependency,
+    leased_token_bucket_dependency,
+)
+from core.rate_limiting import AsyncRedisBackend, RedisBackend
+
+LIMIT = 6
+
+
+def make_app(limiter):
+    app = FastAPI()
+
+    @app.get(
+        "/limited",
+        dependencies=[Depends(async_leased_token_bucket_dependency(limiter))],
+    )
+    async def limited():
+        return {}
+
+    return app
+
+
+def test_async_leases_enforce_the_shared_limit():
+    server = fakeredis.FakeServer()
+    client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    limiter = AsyncLeasedTokenBucket(
+        AsyncRedisBackend(client), max_tokens=LIMIT, refill_rate=0.001, chunk_size=4
+    )
+    with TestClient(make_app(limiter)) as test_client:
+        statuses = [
+            test_client.get("/limited?user_id=u").status_code for _ in range(LIMIT + 3)
+        ]
+        assert statuses == [200] * LIMIT + [429] * 3
+        assert limiter.stats()["remote_leases"] == 3
+        test_client.portal.call(limiter.close)
+
+    assert limiter.stats()["leases"] == 0
+    sync_client = fakeredis.FakeStrictRedis(server=server, decode_responses=True)
+    tokens = float(sync_client.hget("token_bucket:u", "tokens"))
+    assert tokens == pytest.approx(0, abs=0.01)
+
+
+def test_unused_tokens_are_returned_on_close():
+    server = fakeredis.FakeServer()
+    client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    limiter = AsyncLeasedTokenBucket(
+        AsyncRedisBackend(client), max_tokens=LIMIT, refill_rate=0.001, chunk_size=4
+    )
+    with TestClient(make_app(limiter)) as test_client:
+        assert test_client.get("/limited?user_id=u").status_code == 200
+        test_client.portal.call(limiter.close)
+
+    sync_client = fakeredis.FakeStrictRedis(server=server, decode_responses=True)
+    tokens = float(sync_client.hget("token_bucket:u", "tokens"))
+    assert tokens == pytest.approx(LIMIT - 1, abs=0.01)
+
+
+def test_sync_dependency_rejects_async_backends():
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    limiter = LeasedTokenBucket(AsyncRedisBackend(client), background_sync=False)
+    with pytest.raises(TypeError):
+        leased_token_bucket_dependency(limiter)
+
+    sync_limiter = LeasedTokenBucket(
+        RedisBackend(fakeredis.FakeStrictRedis(decode_responses=True)),
+        background_sync=False,
+    )
+    assert callable(leased_token_bucket_dependency(sync_limiter))
@@ -0,0 +1,151 @@
+import random
+import threading
+
+import fakeredis
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from core.in_memory import InMemoryBackend
+from core.rate_limit_middleware import RateLimitPolicy, RoutePolicyTable
+from core.rate_limiting import (
+    RedisBackend,
+    gcra_dependency,
+    get_rate_limit_backend,
+    leaky_bucket_dependency,
+    sliding_window_counter_dependency,
+    token_bucket_dependency,
+)
+
+LIMIT = 20
+THREADS = 16
+REQUESTS_PER_THREAD = 50
+
+# name -> call taking (backend, key, now); both limit to LIMIT per 10 seconds
+ALGORITHMS = {
+    "token_bucket": lambda backend, key, now: backend.token_bucket(
+        key, LIMIT, LIMIT / 10, now
+    ),
+    "leaky_bucket": lambda backend, key, now: backend.leaky_bucket(
+        key, LIMIT, LIMIT / 10, now
+    ),
+}
+
+
+@pytest.fixture
+def redis_backend():
+    return RedisBackend(fakeredis.FakeStrictRedis(decode_responses=True))
+
+
+def run_concurrently(decide, now_for):
+    """
+    Fire THREADS * REQUESTS_PER_THREAD decisions from THREADS threads at once.
+    """
+    admitted = []
+    barrier = threading.Barrier(THREADS)
+
+    def worker(index):
+        barrier.wait()
+        for number in range(REQUESTS_PER_THREAD):
+            now = now_for(index, number)
+            if decide(now)[0]:
+                admitted.append(now)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return admitted
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_concurrent_burst_never_exceeds_limit(redis_backend, algorithm):
+    call = ALGORITHMS[algorithm]
+    admitted = run_concurrently(
+        lambda now: call(redis_backend, "burst", now), lambda index, number: 1000.0
+    )
+    memory = InMemoryBackend()
+    expected = sum(
+        call(memory, "burst", 1000.0)[0] for _ in range(THREADS * REQUESTS_PER_THREAD)
+    )
+    assert len(admitted) == expected == LIMIT
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_concurrent_rounds_match_in_memory_backend(redis_backend, algorithm):
+    # Every 0.7 s all threads fire together. Requests within a round share
+    # their timestamp, so any interleaving must admit exactly what a serial
+    # run does, fractional refills included.
+    call = ALGORITHMS[algorithm]
+    memory = InMemoryBackend()
+    for round_number in range(8):
+        now = 1000.0 + round_number * 0.7
+        admitted = run_concurrently(
+            lambda now: call(redis_backend, "rounds", now),
+            lambda index, number: now,
+        )
+        expected = sum(
+            call(memory, "rounds", now)[0] for _ in range(THREADS * REQUESTS_PER_THREAD)
+        )
+        assert len(admitted) == expected <= LIMIT
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_matches_in_memory_backend(redis_backend, algorithm):
+    # Poisson traffic at twice the limit with fractional refills in between
+    call = ALGORITHMS[algorithm]
+    memory = InMemoryBackend()
+    rng = random.Random(7)
+    now = 1000.0
+    for _ in range(2000):
+        now += rng.expovariate(2 * LIMIT / 10)
+        redis_allowed, redis_level = call(redis_backend, "same", now)
+        memory_allowed, memory_level = call(memory, "same", now)
+        assert redis_allowed == memory_allowed
+        assert redis_level == pytest.approx(memory_level)
+
+
+@pytest.fixture
+def limited_client(redis_backend):
+    app = FastAPI()
+    app.dependency_overrides[get_rate_limit_backend] = lambda: redis_backend
+    for name, dependency in [
+        ("gcra", gcra_dependency),
+        ("token_bucket", token_bucket_dependency),
+        ("leaky_bucket", leaky_bucket_dependency),
+        ("sliding_window_counter", sliding_window_counter_dependency),
+    ]:
+        app.add_api_route(
+            f"/{name}", lambda: {}, dependencies=[Depends(dependency)], methods=["GET"]
+        )
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "/gcra?user_id=u&rate=0",
+        "/gcra?user_id=u&rate=-1",
+        "/gcra?user_id=u&burst=0",
+        "/token_bucket?user_id=u&refill_rate=0",
+        "/leaky_bucket?user_id=u&leak_rate=0",
+        "/sliding_window_counter?user_id=u&sub_window_seconds=0",
+    ],
+)
+def test_non_positive_parameters_are_rejected(limited_client, query):
+    assert limited_client.get(query).status_code == 422
+
+
+def test_positive_parameters_are_allowed(limited_client):
+    response = limited_client.get("/gcra?user_id=u&rate=0.5&burst=2")
+    assert response.status_code == 200
+    assert response.headers["RateLimit-Limit"] == "2"
+
+
+def test_policy_table_rejects_non_positive_limits():
+    with pytest.raises(ValueError):
+        RoutePolicyTable([RateLimitPolicy("zero", "*", "*", 0)])
+    with pytest.raises(ValueError):
+        RoutePolicyTable([RateLimitPolicy("instant", "*", "*", 10, period=0)])
@@ -0,0 +1,30 @@
+import base64
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+from core.streaming import _csv_chunk, _ndjson_chunk
+
+ROW = {
+    "amount": Decimal("12345678901234.57"),
+    "image": b"\x89PNG\xff\x00",
+    "paymentDate": date(2004, 10, 19),
+    "customerNumber": 103,
+}
+
+
+def test_ndjson_keeps_decimals_and_bytes_exact():
+    record = json.loads(_ndjson_chunk([ROW]))
+    assert Decimal(record["amount"]) == ROW["amount"]
+    assert base64.b64decode(record["image"]) == ROW["image"]
+    assert record["paymentDate"] == "2004-10-19"
+    assert record["customerNumber"] == 103
+
+
+def test_csv_matches_ndjson():
+    header, values = csv.reader(io.StringIO(_csv_chunk([ROW], header=list(ROW))))
+    record = json.loads(_ndjson_chunk([ROW]))
+    assert header == list(ROW)
+    assert values == [str(record[name]) for name in header]